@@ -0,0 +1,90 @@
+import http.client
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+AGENT_PATH = '/agent/metrics'
+
+
+# Cliente de un agente con una conexión HTTP persistente (keep-alive)
+class AgentClient:
+    def __init__(self, address, timeout):
+        self.address = address
+        host, _, port = address.rpartition(':')
+        self.host = host or address
+        self.port = int(port) if host else 5000
+        self.timeout = timeout
+        self._conn = None
+
+    def fetch(self, path=AGENT_PATH):
+        # Si la conexión reutilizada la cerró el agente, se reintenta una vez con una nueva
+        for attempt in range(2):
+            reused = self._conn is not None
+            if not reused:
+                self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self._conn.request('GET', path)
+                response = self._conn.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException):
+                self.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            if response.status != 200:
+                raise http.client.HTTPException('%s respondió %d' % (self.address, response.status))
+            return json.loads(body)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+# Agregador: consulta todos los agentes en paralelo y guarda el último valor
+# conocido de cada uno. Un agente lento o caído no retrasa a los demás.
+class Aggregator:
+    def __init__(self, agents, timeout=2.0):
+        self.timeout = timeout
+        self.clients = [AgentClient(address, timeout) for address in agents]
+        # Último estado de cada agente; cada entrada se sustituye entera al actualizarse
+        self._hosts = {client.address: {
+            'address': client.address,
+            'status': 'Apagado',
+            'updated': None,
+            'error': None,
+            'payload': None
+        } for client in self.clients}
+        self._pending = set()  # Agentes con una petición todavía en curso
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=min(32, max(1, len(self.clients))),
+                                        thread_name_prefix='aggregator')
+
+    def hosts(self):
+        return [self._hosts[client.address] for client in self.clients]
+
+    def _fetch(self, client):
+        previous = self._hosts[client.address]
+        try:
+            payload = client.fetch()
+        except Exception as error:
+            self._hosts[client.address] = dict(previous, status='Apagado', error=str(error))
+        else:
+            self._hosts[client.address] = dict(previous, status='Encendido', error=None,
+                                               updated=time.time(), payload=payload)
+        finally:
+            with self._lock:
+                self._pending.discard(client.address)
+
+    # Una ronda de consultas concurrentes; espera como mucho `timeout` segundos
+    def poll(self):
+        futures = []
+        with self._lock:
+            for client in self.clients:
+                if client.address in self._pending:
+                    continue
+                self._pending.add(client.address)
+                futures.append(self._pool.submit(self._fetch, client))
+        wait(futures, timeout=self.timeout)
+        return {'time': time.time(), 'hosts': self.hosts()}
@@ -0,0 +1,283 @@
+import json
+import logging
+import math
+import threading
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Reglas por defecto si no se indica un archivo con MONITOR_ALERT_RULES
+DEFAULT_RULES = (
+    {'name': 'cpu_alta', 'kind': 'threshold', 'metric': 'cpu_percent', 'op': '>', 'value': 90,
+     'clear': 80, 'window': 300, 'aggregate': 'min', 'severity': 'critical',
+     'summary': 'CPU por encima del 90 % durante 5 minutos'},
+    {'name': 'swap_creciendo', 'kind': 'rate', 'metric': 'swap_used', 'op': '>', 'value': 1024 ** 2 / 60,
+     'clear': 0, 'window': 600, 'severity': 'warning',
+     'summary': 'El uso de swap crece más de 1 MB/min'},
+    {'name': 'disco_lleno_pronto', 'kind': 'projection', 'metric': 'disk_used', 'limit': 'disk_total',
+     'op': '<', 'value': 86400, 'clear': 2 * 86400, 'window': 3600, 'severity': 'warning',
+     'summary': 'El disco se llenará en menos de 24 h al ritmo de la última hora'},
+    {'name': 'disco_casi_lleno', 'kind': 'threshold', 'metric': 'disk_percent', 'op': '>', 'value': 95,
+     'clear': 90, 'severity': 'critical', 'summary': 'Menos de un 5 % de espacio libre en disco'},
+)
+
+KINDS = ('threshold', 'rate', 'projection')
+AGGREGATES = ('last', 'min', 'max', 'avg')
+OPS = {'>': lambda a, b: a > b, '<': lambda a, b: a < b}
+
+
+# Valores de una muestra por métrica y dispositivo (None si la métrica es global)
+def sample_values(sample):
+    server = sample['server']
+    values = {
+        'cpu_percent': {None: server['cpu_percent']},
+        'memory_percent': {None: server['memory'].percent},
+        'memory_used': {None: server['memory'].used},
+        'swap_percent': {None: server['swap'].percent},
+        'swap_used': {None: server['swap'].used},
+        'load_1m': {None: server['load_avg'][0]},
+        'net_sent_rate': {None: sample['rates']['network']['sent']},
+        'net_recv_rate': {None: sample['rates']['network']['recv']},
+        'disk_used': {device: usage.used for device, usage in server['disk_usage'].items()},
+        'disk_total': {device: usage.total for device, usage in server['disk_usage'].items()},
+        'disk_percent': {device: usage.percent for device, usage in server['disk_usage'].items()},
+    }
+    if isinstance(server['temperature'], (int, float)):
+        values['temperature'] = {None: server['temperature']}
+    return values
+
+
+# Ventana deslizante de `seconds` segundos. Mantiene de forma incremental la
+# media, el mínimo y el máximo (colas monótonas) y las sumas de la regresión
+# lineal, así que añadir una muestra cuesta O(1) amortizado.
+class SlidingWindow:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self._samples = deque()  # (t, v) con t relativo a `_origin`
+        self._min = deque()
+        self._max = deque()
+        self._origin = None
+        self._sums = [0.0, 0.0, 0.0, 0.0]  # Σt, Σv, Σt², Σtv
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, timestamp, value):
+        if self._origin is None:
+            self._origin = timestamp
+        elif timestamp - self._origin > 2 * self.seconds + 1:
+            self._rebase()
+        t = timestamp - self._origin
+        self._samples.append((t, value))
+        self._accumulate(t, value, 1)
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((t, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((t, value))
+
+        oldest = t - self.seconds
+        while self._samples[0][0] < oldest:
+            old = self._samples.popleft()
+            self._accumulate(old[0], old[1], -1)
+        while self._min[0][0] < oldest:
+            self._min.popleft()
+        while self._max[0][0] < oldest:
+            self._max.popleft()
+
+    def _accumulate(self, t, value, sign):
+        sums = self._sums
+        sums[0] += sign * t
+        sums[1] += sign * value
+        sums[2] += sign * t * t
+        sums[3] += sign * t * value
+
+    # Mover el origen a la muestra más antigua y recalcular las sumas: evita
+    # perder precisión con marcas de tiempo grandes. Ocurre una vez cada dos
+    # ventanas, de modo que el coste amortizado sigue siendo O(1).
+    def _rebase(self):
+        shift = self._samples[0][0] if self._samples else 0.0
+        self._origin += shift
+        self._samples = deque((t - shift, v) for t, v in self._samples)
+        self._min = deque((t - shift, v) for t, v in self._min)
+        self._max = deque((t - shift, v) for t, v in self._max)
+        self._sums = [0.0, 0.0, 0.0, 0.0]
+        for t, value in self._samples:
+            self._accumulate(t, value, 1)
+
+    def last(self):
+        return self._samples[-1][1]
+
+    def min(self):
+        return self._min[0][1]
+
+    def max(self):
+        return self._max[0][1]
+
+    def avg(self):
+        return self._sums[1] / len(self._samples)
+
+    # Pendiente por segundo de la recta de mínimos cuadrados
+    def slope(self):
+        n = len(self._samples)
+        st, sv, stt, stv = self._sums
+        denominator = n * stt - st * st
+        if n < 2 or denominator <= 0:
+            return 0.0
+        return (n * stv - st * sv) / denominator
+
+
+# Regla de alerta. `threshold` compara un agregado de la ventana con `value`,
+# `rate` compara la pendiente (unidades por segundo) y `projection` compara
+# los segundos que faltan para que `metric` alcance `limit` al ritmo actual.
+# Se dispara cuando el valor cumple `op value` con la ventana completa y se
+# resuelve cuando deja de cumplir `op clear` (histéresis).
+class Rule:
+    def __init__(self, name, kind, metric, op, value, clear=None, window=0, aggregate='last',
+                 limit=None, severity='warning', summary=''):
+        if kind not in KINDS or op not in OPS or aggregate not in AGGREGATES:
+            raise ValueError('Regla de alerta no válida: %s' % name)
+        if kind == 'projection' and limit is None:
+            raise ValueError('La regla %s necesita un límite' % name)
+        self.name = name
+        self.kind = kind
+        self.metric = metric
+        self.op = op
+        self.value = value
+        self.clear = value if clear is None else clear
+        self.window = window
+        self.aggregate = aggregate
+        self.limit = limit
+        self.severity = severity
+        self.summary = summary
+
+    def measure(self, window, limit):
+        if self.kind == 'threshold':
+            return getattr(window, self.aggregate)()
+        if self.kind == 'rate':
+            return window.slope()
+        slope = window.slope()
+        if slope <= 0:
+            return math.inf
+        return max(0.0, (limit - window.last()) / slope)
+
+
+def load_rules(path=None):
+    if path is None:
+        specs = DEFAULT_RULES
+    else:
+        with open(path) as f:
+            specs = json.load(f)
+    return [Rule(**spec) for spec in specs]
+
+
+# Estado de una regla para un dispositivo
+class RuleState:
+    def __init__(self, window, started):
+        self.window = window
+        self.started = started
+        self.firing = False
+        self.since = None
+
+
+# Evalúa las reglas con cada muestra. Solo se notifican los cambios de estado
+# (disparada / resuelta), así que una alerta activa no se repite.
+class AlertEngine:
+    def __init__(self, rules, sinks=()):
+        self.rules = list(rules)
+        self.sinks = list(sinks)
+        self._states = {}  # (regla, dispositivo) -> RuleState
+        self._active = {}  # (regla, dispositivo) -> evento de la alerta activa
+        self._lock = threading.Lock()
+
+    # Oyente del muestreador: O(1) por regla y dispositivo
+    def evaluate(self, sample):
+        now = sample['time']
+        values = sample_values(sample)
+        seen = set()
+        for rule in self.rules:
+            limits = values.get(rule.limit, {})
+            for device, value in values.get(rule.metric, {}).items():
+                if rule.limit is not None and device not in limits:
+                    continue
+                key = (rule.name, device)
+                seen.add(key)
+                state = self._states.get(key)
+                if state is None:
+                    state = self._states[key] = RuleState(SlidingWindow(rule.window), now)
+                state.window.add(now, value)
+                if now - state.started < rule.window:
+                    continue  # Ventana todavía incompleta
+                measured = rule.measure(state.window, limits.get(device))
+                if not state.firing and OPS[rule.op](measured, rule.value):
+                    state.firing = True
+                    state.since = now
+                    self._notify(rule, device, 'firing', measured, now, state.since)
+                elif state.firing and not OPS[rule.op](measured, rule.clear):
+                    state.firing = False
+                    self._notify(rule, device, 'resolved', measured, now, state.since)
+
+        # Dispositivos que han desaparecido (p. ej. discos desmontados)
+        if len(seen) != len(self._states):
+            rules = {rule.name: rule for rule in self.rules}
+            for key in self._states.keys() - seen:
+                state = self._states.pop(key)
+                if state.firing:
+                    self._notify(rules[key[0]], key[1], 'resolved', math.nan, now, state.since)
+
+    def _notify(self, rule, device, status, value, now, since):
+        event = {
+            'rule': rule.name,
+            'device': device,
+            'status': status,
+            'severity': rule.severity,
+            'summary': rule.summary,
+            'value': value if math.isfinite(value) else None,
+            'threshold': rule.value if status == 'firing' else rule.clear,
+            'since': since,
+            'time': now
+        }
+        with self._lock:
+            if status == 'firing':
+                self._active[(rule.name, device)] = event
+            else:
+                self._active.pop((rule.name, device), None)
+        for sink in self.sinks:
+            try:
+                sink(event)
+            except Exception:
+                logger.exception('Error al notificar la alerta %s', rule.name)
+
+    def active(self):
+        with self._lock:
+            return sorted(self._active.values(), key=lambda event: event['since'])
+
+
+def log_sink(event):
+    level = logging.WARNING if event['status'] == 'firing' else logging.INFO
+    logger.log(level, 'Alerta %s %s%s: %s (valor %r)', event['rule'], event['status'],
+               ' [%s]' % event['device'] if event['device'] else '', event['summary'], event['value'])
+
+
+# Envía cada evento como JSON a un webhook. Los envíos van en un hilo aparte
+# para no retrasar al muestreador si el receptor tarda o no responde.
+class WebhookSink:
+    def __init__(self, url, timeout=5.0):
+        self.url = url
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='alert-webhook')
+
+    def __call__(self, event):
+        self._pool.submit(self._post, event)
+
+    def _post(self, event):
+        request = urllib.request.Request(self.url, data=json.dumps(event).encode(),
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except OSError as e:
+            logger.warning('No se pudo enviar la alerta %s a %s: %s', event['rule'], self.url, e)
@@ -0,0 +1,145 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Percentiles calculados por defecto
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+# Máximo de anomalías listadas en la respuesta (se cuentan todas)
+MAX_ANOMALIES = 100
+# Exponente máximo de los pesos dentro de un bloque de la EWMA, para no desbordar
+EWMA_BLOCK_EXPONENT = 50.0
+# Con tier=auto, puntos de referencia para elegir el nivel: se lee el más fino
+# que cubra el rango sin pasar de rollup.OVERSAMPLE veces esta cantidad
+STATS_POINTS = 2000
+
+
+# Media móvil exponencial vectorizada: y[i] = alpha * x[i] + (1 - alpha) * y[i-1].
+# Dentro de cada bloque la recurrencia se resuelve con una suma acumulada
+# ponderada; los bloques se limitan para que los pesos no desborden.
+def ewma(values, alpha):
+    values = np.asarray(values, np.float64)
+    result = np.empty_like(values)
+    if not len(values):
+        return result
+    if alpha >= 1:
+        result[:] = values
+        return result
+    decay = 1.0 - alpha
+    block = max(1, int(EWMA_BLOCK_EXPONENT / -math.log(decay)))
+    powers = decay ** np.arange(block + 1)
+    previous = values[0]
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        n = len(chunk)
+        # y[k] = decay^(k+1) * previous + alpha * sum_j decay^(k-j) * x[j]
+        weighted = np.cumsum(chunk / powers[1:n + 1]) * alpha
+        result[start:start + n] = (weighted + previous / powers[0]) * powers[1:n + 1]
+        previous = result[start + n - 1]
+    return result
+
+
+# Estadísticos de una serie: mínimo, máximo, media, desviación, percentiles,
+# último valor de la EWMA y anomalías por z-score (|z| > `threshold`)
+def summarize(times, values, percentiles=DEFAULT_PERCENTILES, alpha=0.1, threshold=3.0):
+    values = np.asarray(values, np.float64)
+    if not len(values):
+        return {'count': 0}
+    mean = float(values.mean())
+    std = float(values.std())
+    if std > 0:
+        z = (values - mean) / std
+        flagged = np.flatnonzero(np.abs(z) > threshold)
+    else:
+        z = np.zeros_like(values)
+        flagged = np.empty(0, np.intp)
+    # Las más extremas, en orden cronológico
+    shown = flagged
+    if len(flagged) > MAX_ANOMALIES:
+        shown = np.sort(flagged[np.argpartition(-np.abs(z[flagged]), MAX_ANOMALIES)[:MAX_ANOMALIES]])
+    times = np.asarray(times, np.float64)
+    return {
+        'count': int(len(values)),
+        'min': float(values.min()),
+        'max': float(values.max()),
+        'mean': mean,
+        'std': std,
+        'percentiles': dict(zip(('%g' % p for p in percentiles),
+                                np.percentile(values, percentiles).tolist())),
+        'ewma': float(ewma(values, alpha)[-1]),
+        'anomaly_count': int(len(flagged)),
+        'anomalies': [{'time': t, 'value': v, 'z': round(s, 2)}
+                      for t, v, s in zip(times[shown].tolist(), values[shown].tolist(), z[shown].tolist())]
+    }
+
+
+# Estadísticas sobre el historial multirresolución. Los resultados se
+# memorizan por (métrica, rango, nivel, parámetros) junto con el número de
+# muestras del nivel consultado: en cuanto llega una muestra nueva a ese
+# nivel, la entrada deja de valer y se recalcula en la siguiente consulta.
+class HistoryStats:
+    def __init__(self, rollups, size=128):
+        self.rollups = rollups
+        self.size = size
+        self._memo = OrderedDict()  # clave -> (versión, resultado)
+        self._lock = threading.Lock()
+
+    # Nivel para `tier` ('auto', 'raw' o una resolución en segundos)
+    def _tier(self, tier, seconds, age):
+        if tier == 'auto':
+            return self.rollups.pick(seconds, STATS_POINTS, age)[1]
+        if tier == 'raw':
+            return None
+        for candidate in self.rollups.tiers:
+            if candidate.resolution == tier:
+                return candidate
+        raise ValueError('Nivel desconocido: %r' % tier)
+
+    # (resolución, tiempos, valores) de `metric` en [start, end) como arrays NumPy
+    def _series(self, metric, start, end, tier):
+        if tier is None:
+            raw = self.rollups.raw
+            oldest = raw.oldest()
+            if self.rollups.archive is not None and (oldest is None or start < oldest):
+                rows = self.rollups.archive.read(start, end, (metric,))
+            else:
+                rows = raw.between(start, end, (metric,))
+            values = rows[metric]
+            resolution = self.rollups.resolution
+        else:
+            rows = tier.store.between(start, end, (metric + '_avg',))
+            values = rows[metric + '_avg']
+            resolution = tier.resolution
+        return resolution, np.frombuffer(rows['time'], np.float64), np.frombuffer(values, np.float64)
+
+    def query(self, metric, seconds, end=None, tier='auto', percentiles=DEFAULT_PERCENTILES,
+              alpha=0.1, threshold=3.0):
+        now = time.time()
+        end_time = now if end is None else end
+        level = self._tier(tier, seconds, now - (end_time - seconds))
+        store = self.rollups.raw if level is None else level.store
+        key = (metric, seconds, end, tier, tuple(percentiles), alpha, threshold)
+        version = store.count
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None and cached[0] == version:
+                self._memo.move_to_end(key)
+                return cached[1]
+
+        resolution, times, values = self._series(metric, end_time - seconds, end_time, level)
+        result = summarize(times, values, percentiles, alpha, threshold)
+        result.update({
+            'metric': metric,
+            'start': end_time - seconds,
+            'end': end_time,
+            'tier': 'raw' if level is None else level.resolution,
+            'resolution': resolution
+        })
+        with self._lock:
+            self._memo[key] = (version, result)
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.size:
+                self._memo.popitem(last=False)
+        return result
@@ -0,0 +1,72 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+
+try:
+    import brotli
+except ImportError:  # Opcional: sin brotli solo se ofrece gzip
+    brotli = None
+
+# Tipos que merece la pena comprimir (las fuentes woff2 ya van comprimidas)
+COMPRESSIBLE = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+# Por debajo de este tamaño la compresión no compensa
+MIN_SIZE = 1024
+
+
+# Codificación preferida según la cabecera Accept-Encoding de la petición
+def negotiate(accept_encodings):
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def compressible(mimetype, size):
+    return size >= MIN_SIZE and (mimetype or '').startswith(COMPRESSIBLE)
+
+
+# Recursos estáticos (Chart.js, Materialize, Font Awesome) servidos desde
+# memoria: cada archivo se lee, se resume y se comprime una sola vez al
+# arrancar, de modo que servirlo es elegir la variante ya preparada.
+class StaticBundle:
+    def __init__(self, directory, prefix):
+        self.prefix = prefix
+        self._files = {}  # nombre -> (mimetype, etag, {codificación: cuerpo})
+        for root, _, names in os.walk(directory):
+            for name in names:
+                path = os.path.join(root, name)
+                with open(path, 'rb') as f:
+                    body = f.read()
+                key = os.path.relpath(path, directory).replace(os.sep, '/')
+                mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                variants = {None: body}
+                if compressible(mimetype, len(body)):
+                    variants['gzip'] = compress(body, 'gzip')
+                    if brotli is not None:
+                        variants['br'] = compress(body, 'br')
+                etag = hashlib.sha1(body).hexdigest()[:16]
+                self._files[key] = (mimetype, etag, variants)
+
+    def __contains__(self, name):
+        return name in self._files
+
+    # URL con la versión del contenido: se puede cachear para siempre
+    def url(self, name):
+        return '%s/%s?v=%s' % (self.prefix, name, self._files[name][1])
+
+    # (cuerpo, mimetype, etag, codificación) de `name` para quien acepta `accept_encodings`
+    def get(self, name, accept_encodings):
+        mimetype, etag, variants = self._files[name]
+        encoding = negotiate(accept_encodings)
+        if encoding not in variants:
+            encoding = 'gzip' if 'gzip' in variants and accept_encodings['gzip'] else None
+        return variants[encoding], mimetype, etag, encoding
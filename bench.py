@@ -0,0 +1,237 @@
+"""Banco de pruebas reproducible de las rutas de recolección y servicio.
+
+Uso:
+    python bench.py [--output RUTA] [--iterations 200] [--processes 5000]
+                    [--clients 8] [--requests 200]
+
+Mide get_local_server_info(), la actualización del top de procesos contra un
+psutil simulado con miles de procesos, la serialización de /data y el
+rendimiento de extremo a extremo de /data y / con varios clientes
+concurrentes (cliente de pruebas de Flask). Escribe los resultados en JSON
+con p50/p99 para comparar ejecuciones antes y después de un cambio; por
+defecto en el directorio temporal (monitor-bench-<revisión>.json), fuera del
+árbol del repositorio.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from types import SimpleNamespace
+from unittest import mock
+
+import psutil
+
+# Semilla fija para que el psutil simulado genere siempre la misma tabla
+SEED = 1234
+
+
+def percentiles(latencies):
+    ordered = sorted(latencies)
+    if not ordered:
+        return {'count': 0}
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        'count': len(ordered),
+        'mean_ms': sum(ordered) / len(ordered) * 1000,
+        'min_ms': ordered[0] * 1000,
+        'p50_ms': pick(0.5),
+        'p90_ms': pick(0.9),
+        'p99_ms': pick(0.99),
+        'max_ms': ordered[-1] * 1000
+    }
+
+
+# Ejecutar `func` `iterations` veces (tras `warmup` vueltas sin medir)
+def measure(func, iterations, warmup=3):
+    for _ in range(warmup):
+        func()
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - started)
+    return percentiles(latencies)
+
+
+# Generador de carga local: `clients` hilos, cada uno con su propio cliente de
+# pruebas, lanzando `requests` peticiones a `path`.
+def load(app, path, clients, requests):
+    latencies = [[] for _ in range(clients)]
+    errors = []
+    barrier = threading.Barrier(clients + 1)
+
+    def worker(index):
+        client = app.test_client()
+        barrier.wait()
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = client.get(path)
+            response.get_data()
+            latencies[index].append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result = percentiles([latency for chunk in latencies for latency in chunk])
+    result.update({
+        'clients': clients,
+        'errors': len(errors),
+        'requests_per_second': clients * requests / elapsed if elapsed else 0.0
+    })
+    return result
+
+
+# psutil simulado con `count` procesos: solo lo que usa ProcessTable
+MemoryInfo = namedtuple('MemoryInfo', ['rss'])
+VirtualMemory = namedtuple('VirtualMemory', ['total'])
+
+
+class FakeProcess:
+    table = {}
+
+    def __init__(self, pid):
+        if pid not in self.table:
+            raise psutil.NoSuchProcess(pid)
+        self.pid = pid
+        self._info = self.table[pid]
+        self._cpu = 0.0
+
+    def oneshot(self):
+        return _Oneshot()
+
+    def is_running(self):
+        return True
+
+    def cpu_percent(self, interval=None):
+        self._cpu = (self._cpu * 7 + self._info['cpu']) % 400
+        return self._cpu
+
+    def memory_info(self):
+        return MemoryInfo(self._info['rss'])
+
+    def name(self):
+        return self._info['name']
+
+    def username(self):
+        return self._info['username']
+
+    def status(self):
+        return 'sleeping'
+
+
+class _Oneshot:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def fake_psutil(count):
+    rng = random.Random(SEED)
+    FakeProcess.table = {
+        pid: {
+            'cpu': rng.random() * 100,
+            'rss': rng.randint(1, 512) * 1024 ** 2,
+            'name': 'proc-%d' % pid,
+            'username': rng.choice(('root', 'www-data', 'postgres', None))
+        }
+        for pid in range(1, count + 1)
+    }
+    return SimpleNamespace(
+        Process=FakeProcess,
+        pids=lambda: list(FakeProcess.table),
+        virtual_memory=lambda: VirtualMemory(64 * 1024 ** 3),
+        Error=psutil.Error,
+        NoSuchProcess=psutil.NoSuchProcess,
+        ZombieProcess=psutil.ZombieProcess,
+        AccessDenied=psutil.AccessDenied
+    )
+
+
+def bench_processes(count, iterations):
+    import processes
+    with mock.patch.object(processes, 'psutil', fake_psutil(count)):
+        table = processes.ProcessTable()
+        first = measure(table.update, 1, warmup=0)
+        steady = measure(table.update, iterations)
+    return {'processes': count, 'first_update': first, 'update': steady}
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', help='archivo JSON de resultados')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--processes', type=int, default=5000)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    # El banco no debe escribir en el archivo real de métricas
+    os.environ.pop('MONITOR_DATA_DIR', None)
+    import monitor
+
+    revision = git_revision()
+    output = args.output or os.path.join(tempfile.gettempdir(), 'monitor-bench-%s.json' % (revision or 'local'))
+    results = {
+        'time': time.time(),
+        'revision': revision,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'arguments': vars(args),
+        'benchmarks': {}
+    }
+    benchmarks = results['benchmarks']
+
+    benchmarks['get_local_server_info'] = measure(monitor.get_local_server_info, args.iterations)
+    benchmarks['process_table'] = bench_processes(args.processes, max(1, args.iterations // 10))
+
+    snapshot = monitor.get_snapshot()
+    benchmarks['serialize_data'] = measure(
+        lambda: monitor.app.json.dumps(monitor.build_data(snapshot)), args.iterations)
+    benchmarks['serialize_data_columnar'] = measure(
+        lambda: monitor.app.json.dumps(monitor.build_data(snapshot, columnar=True)), args.iterations)
+
+    # El formato columnar y los rangos son rutas distintas de /data: ?range= no admite ?format=
+    for path in ('/data', '/data?format=columnar', '/data?range=1h', '/'):
+        benchmarks['http ' + path] = load(monitor.app, path, args.clients, args.requests)
+
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    for name, result in sorted(benchmarks.items()):
+        result = result.get('update', result)
+        print('%-36s p50 %8.3f ms   p99 %8.3f ms' % (name, result['p50_ms'], result['p99_ms']))
+    print('Resultados en %s' % output, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
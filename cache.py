@@ -0,0 +1,81 @@
+import logging
+import threading
+import time
+
+from executor import DaemonPool
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+# Caché de recolectores con caducidad por entrada. Una entrada caducada se
+# sigue sirviendo mientras se refresca en segundo plano, y nunca hay más de un
+# refresco en curso por entrada: una llamada colgada (p. ej. un montaje NFS
+# muerto) ocupa un único hilo y no bloquea a quien lee la caché. Con más
+# refrescos colgados que hilos, los demás esperan en cola: overdue() los delata.
+class TTLCache:
+    def __init__(self, workers=8):
+        self._entries = {}  # clave -> [valor, caduca, futuro en curso, lanzado]
+        self._lock = threading.Lock()
+        self._pool = DaemonPool(workers, 'cache')
+
+    # Valor de `key`, cargado con `loader` y válido `ttl` segundos (None: para
+    # siempre). Sin `default`, la primera carga es síncrona en el hilo que
+    # llama; con `default`, la primera carga va en segundo plano y se espera
+    # como mucho `wait` segundos antes de devolver `default`.
+    def get(self, key, loader, ttl, default=MISSING, wait=0.0):
+        now = time.monotonic()
+        created = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and default is not MISSING:
+                # Entrada nueva con el valor por defecto, ya caducada para cargarla
+                entry = self._entries[key] = [default, now, None, None]
+                created = True
+            if entry is not None:
+                value, expires, future, _ = entry
+                if expires is not None and now >= expires and future is None:
+                    future = entry[2] = self._pool.submit(self._load, key, loader, ttl)
+                    entry[3] = now
+        if entry is None:
+            value = loader()
+            with self._lock:
+                self._entries[key] = [value, None if ttl is None else now + ttl, None, None]
+            return value
+        if created and wait:
+            try:
+                return future.result(timeout=wait)
+            except Exception:
+                pass  # Tiempo agotado o fallo del loader: se sirve el valor por defecto
+        return value
+
+    def _load(self, key, loader, ttl):
+        try:
+            value = loader()
+        except Exception:
+            logger.debug('Error al refrescar %r', key, exc_info=True)
+            with self._lock:
+                entry = self._entries[key]
+                # Reintentar tras otro `ttl`, conservando el último valor conocido
+                entry[1] = time.monotonic() + (ttl or 0)
+                entry[2] = entry[3] = None
+            raise
+        with self._lock:
+            self._entries[key] = [value, None if ttl is None else time.monotonic() + ttl, None, None]
+        return value
+
+    # Claves cuyo refresco (en curso o en cola) se lanzó hace más de `grace`
+    # segundos: su valor es el último conocido, o el valor por defecto
+    def overdue(self, grace):
+        limit = time.monotonic() - grace
+        with self._lock:
+            return [key for key, entry in self._entries.items()
+                    if entry[3] is not None and entry[3] < limit]
+
+    # Olvidar las entradas cuya clave ya no cumple `keep` (p. ej. discos desmontados)
+    def prune(self, keep):
+        with self._lock:
+            for key in [key for key in self._entries if not keep(key)]:
+                if self._entries[key][2] is None:
+                    del self._entries[key]
@@ -0,0 +1,93 @@
+import os
+import time
+
+from rates import CounterRates
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+# Columnas que se guardan en el historial de cada cgroup
+CGROUP_COLUMNS = ('cpu_cores', 'user_cores', 'system_cores', 'throttled', 'memory_bytes')
+
+
+# Raíz de la jerarquía unificada (cgroup v2), pura o en modo híbrido; None si no hay
+def unified_root(base=CGROUP_ROOT):
+    for path in (base, os.path.join(base, 'unified')):
+        if os.path.exists(os.path.join(path, 'cgroup.controllers')):
+            return path
+    return None
+
+
+def _read_keyed(path):
+    try:
+        with open(path) as f:
+            return {key: int(value) for key, value in (line.split() for line in f if line.strip())}
+    except (OSError, ValueError):
+        return {}
+
+
+# Valor de un archivo de una línea; None si no existe o es "max" (sin límite)
+def _read_value(path):
+    try:
+        with open(path) as f:
+            text = f.read().split()
+    except OSError:
+        return None
+    if not text or text[0] == 'max':
+        return None
+    if len(text) == 2:  # cpu.max: "cuota periodo" -> núcleos
+        return int(text[0]) / int(text[1])
+    return int(text[0])
+
+
+# Lee CPU y memoria de los cgroups v2 (contenedores, slices y servicios de
+# systemd) hasta `depth` niveles bajo la raíz. El uso de CPU se deriva de los
+# contadores acumulados de cpu.stat, en núcleos.
+class CgroupReader:
+    def __init__(self, root, depth=2):
+        self.root = root
+        self.depth = depth
+        self._rates = CounterRates()
+
+    def groups(self):
+        found = ['/']
+        level = [self.root]
+        for _ in range(self.depth):
+            children = []
+            for path in level:
+                try:
+                    entries = os.scandir(path)
+                except OSError:
+                    continue
+                with entries:
+                    children.extend(entry.path for entry in entries if entry.is_dir(follow_symlinks=False))
+            found.extend('/' + os.path.relpath(path, self.root) for path in children)
+            level = children
+        return found
+
+    def read(self, group):
+        path = os.path.join(self.root, group.lstrip('/'))
+        stat = _read_keyed(os.path.join(path, 'cpu.stat'))
+        return {
+            'counters': {key: stat.get(key, 0) for key in ('usage_usec', 'user_usec', 'system_usec', 'throttled_usec')},
+            'memory_bytes': _read_value(os.path.join(path, 'memory.current')),
+            'memory_limit': _read_value(os.path.join(path, 'memory.max')),
+            'cpu_limit': _read_value(os.path.join(path, 'cpu.max'))
+        }
+
+    def update(self):
+        now = time.time()
+        groups = {}
+        for group in self.groups():
+            raw = self.read(group)
+            rates = self._rates.update(group, now, raw['counters'])
+            groups[group] = {
+                'cpu_cores': rates['usage_usec'] / 1e6,
+                'user_cores': rates['user_usec'] / 1e6,
+                'system_cores': rates['system_usec'] / 1e6,
+                'throttled': rates['throttled_usec'] / 1e6,  # Segundos de espera por cada segundo
+                'memory_bytes': raw['memory_bytes'],
+                'memory_limit': raw['memory_limit'],
+                'cpu_limit': raw['cpu_limit']
+            }
+        self._rates.retain(groups)
+        return {'time': now, 'groups': groups}
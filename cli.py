@@ -0,0 +1,263 @@
+"""Exportador sin interfaz web: muestrea el equipo y emite cada muestra.
+
+Uso:
+    python cli.py [--interval 1] [--format ndjson|csv] [--output DESTINO]
+                  [--count N] [--buffer 65536] [--flush-interval 10]
+                  [--max-bytes 10485760] [--backups 5]
+
+DESTINO es "-" (salida estándar, por defecto), una ruta de archivo (que rota
+al superar --max-bytes) o "unix:/ruta/al/socket" (un socket de flujo que ya
+esté escuchando). Usa los mismos recolectores que el panel, pero no importa
+Flask ni NumPy: solo psutil y la biblioteca estándar.
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+logger = logging.getLogger('monitor.cli')
+
+# Columnas de cada registro, en el orden del CSV
+FIELDS = (
+    'time', 'host', 'cpu_percent', 'load_1m', 'load_5m', 'load_15m',
+    'memory_used', 'memory_available', 'memory_percent', 'swap_used', 'swap_percent',
+    'net_sent_rate', 'net_recv_rate', 'disk_read_rate', 'disk_write_rate',
+    'disk_read_iops', 'disk_write_iops', 'temperature', 'stale'
+)
+
+
+# Registro plano de una muestra (velocidades en bytes u operaciones por segundo)
+def flatten(sample):
+    server = sample['server']
+    rates = sample['rates']
+    load = server['load_avg']
+    temperature = server['temperature']
+    return {
+        'time': round(sample['time'], 3),
+        'host': server['name'],
+        'cpu_percent': server['cpu_percent'],
+        'load_1m': load[0],
+        'load_5m': load[1],
+        'load_15m': load[2],
+        'memory_used': server['memory'].used,
+        'memory_available': server['memory'].available,
+        'memory_percent': server['memory'].percent,
+        'swap_used': server['swap'].used,
+        'swap_percent': server['swap'].percent,
+        'net_sent_rate': round(rates['network']['sent'], 1),
+        'net_recv_rate': round(rates['network']['recv'], 1),
+        'disk_read_rate': round(rates['disk_total']['read_rate'], 1),
+        'disk_write_rate': round(rates['disk_total']['write_rate'], 1),
+        'disk_read_iops': round(rates['disk_total']['read_iops'], 1),
+        'disk_write_iops': round(rates['disk_total']['write_iops'], 1),
+        'temperature': temperature if isinstance(temperature, (int, float)) else None,
+        'stale': sample['stale']
+    }
+
+
+# NDJSON: el registro plano más el uso por núcleo y por disco
+def ndjson_line(sample):
+    record = flatten(sample)
+    record['per_cpu'] = sample['server']['per_cpu']
+    record['disks'] = {device: usage.percent for device, usage in sample['server']['disk_usage'].items()}
+    return (json.dumps(record, separators=(',', ':')) + '\n').encode()
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        value = ';'.join(value)
+    value = str(value)
+    if any(c in value for c in ',"\n'):
+        value = '"%s"' % value.replace('"', '""')
+    return value
+
+
+def csv_header():
+    return (','.join(FIELDS) + '\n').encode()
+
+
+def csv_line(sample):
+    record = flatten(sample)
+    return (','.join(_csv_value(record[name]) for name in FIELDS) + '\n').encode()
+
+
+# Destinos: reciben bloques de bytes ya codificados con write() y se cierran con close()
+class StreamSink:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data):
+        self.stream.write(data)
+        self.stream.flush()
+
+    def close(self):
+        self.stream.flush()
+
+
+# Archivo que rota por tamaño: ruta -> ruta.1 -> ... -> ruta.<backups>.
+# `header` se escribe al principio de cada archivo nuevo (cabecera CSV).
+class RotatingFileSink:
+    def __init__(self, path, max_bytes, backups, header=b''):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.header = header
+        self._file = None
+        self._open()
+
+    def _open(self):
+        self._file = open(self.path, 'ab')
+        if self._file.tell() == 0 and self.header:
+            self._file.write(self.header)
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backups - 1, 0, -1):
+            source = '%s.%d' % (self.path, index)
+            if os.path.exists(source):
+                os.replace(source, '%s.%d' % (self.path, index + 1))
+        if self.backups > 0:
+            os.replace(self.path, self.path + '.1')
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def write(self, data):
+        if self.max_bytes and self._file.tell() + len(data) > self.max_bytes and self._file.tell() > len(self.header):
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+# Cliente de un socket Unix de flujo. Si el receptor no está, los datos se
+# descartan y se reintenta la conexión en la siguiente escritura.
+class UnixSocketSink:
+    def __init__(self, path, header=b''):
+        self.path = path
+        self.header = header
+        self._socket = None
+
+    def write(self, data):
+        if self._socket is None:
+            try:
+                self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._socket.connect(self.path)
+                self._socket.sendall(self.header)
+            except OSError as e:
+                logger.warning('No se pudo conectar a %s: %s', self.path, e)
+                self._socket.close()
+                self._socket = None
+                return
+        try:
+            self._socket.sendall(data)
+        except OSError as e:
+            logger.warning('Conexión con %s perdida: %s', self.path, e)
+            self._socket.close()
+            self._socket = None
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+
+
+# Acumula líneas en memoria y las escribe en bloque al llegar a `size` bytes
+# o cuando han pasado `interval` segundos desde la última escritura
+class BufferedWriter:
+    def __init__(self, sink, size, interval):
+        self.sink = sink
+        self.size = size
+        self.interval = interval
+        self._chunks = []
+        self._pending = 0
+        self._flushed = time.monotonic()
+
+    def write(self, line):
+        self._chunks.append(line)
+        self._pending += len(line)
+        if self._pending >= self.size or time.monotonic() - self._flushed >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if self._chunks:
+            self.sink.write(b''.join(self._chunks))
+            self._chunks = []
+            self._pending = 0
+        self._flushed = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self.sink.close()
+
+
+def open_sink(output, header, max_bytes, backups):
+    if output == '-':
+        return StreamSink(sys.stdout.buffer)
+    if output.startswith('unix:'):
+        return UnixSocketSink(output[len('unix:'):], header)
+    return RotatingFileSink(output, max_bytes, backups, header)
+
+
+def _stop(signum, frame):
+    raise SystemExit(0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--interval', type=float, default=1.0, help='segundos entre muestras')
+    parser.add_argument('--format', choices=('ndjson', 'csv'), default='ndjson')
+    parser.add_argument('--output', default='-', help='"-", una ruta o unix:/ruta')
+    parser.add_argument('--count', type=int, default=0, help='número de muestras (0: sin límite)')
+    parser.add_argument('--buffer', type=int, default=64 * 1024, help='bytes acumulados antes de escribir')
+    parser.add_argument('--flush-interval', type=float, default=None,
+                        help='segundos máximos sin escribir (por defecto, cada muestra en un terminal y 10 s si no)')
+    parser.add_argument('--max-bytes', type=int, default=10 * 1024 ** 2, help='tamaño de rotación del archivo')
+    parser.add_argument('--backups', type=int, default=5, help='archivos rotados que se conservan')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(levelname)s %(name)s: %(message)s')
+
+    # Import diferido: --help no paga el arranque de psutil ni de los recolectores
+    from collectors import collect_sample
+
+    header = csv_header() if args.format == 'csv' else b''
+    encode = csv_line if args.format == 'csv' else ndjson_line
+    flush_interval = args.flush_interval
+    if flush_interval is None:
+        flush_interval = 0.0 if args.output == '-' and sys.stdout.isatty() else 10.0
+    sink = open_sink(args.output, header, args.max_bytes, args.backups)
+    if args.output == '-' and header:
+        sink.write(header)
+    writer = BufferedWriter(sink, args.buffer, flush_interval)
+
+    signal.signal(signal.SIGTERM, _stop)
+    written = 0
+    next_tick = time.monotonic()
+    try:
+        while True:
+            writer.write(encode(collect_sample()))
+            written += 1
+            if args.count and written >= args.count:
+                break
+            # Cadencia fija, como el muestreador del panel
+            next_tick += args.interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+
+
+if __name__ == '__main__':
+    main()
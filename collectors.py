@@ -0,0 +1,267 @@
+"""Recolectores del servidor local, sin dependencias del servidor web.
+
+Los usan tanto el panel (monitor.py) como el exportador de línea de órdenes
+(cli.py), que no importa Flask.
+"""
+import os
+import platform
+import socket
+import time
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache, partial
+
+import psutil
+
+from cache import TTLCache
+from executor import DeadlineExecutor
+from instrumentation import Instrumentation
+from rates import CounterRates, CpuUsage
+
+# Instrumentación del propio monitor (duraciones, CPU y memoria), en /debug/stats
+stats = Instrumentation()
+
+# Caché de datos que cambian poco, con caducidad por familia (en segundos).
+# Los datos estáticos del equipo se leen una sola vez.
+PARTITIONS_TTL = float(os.environ.get('MONITOR_PARTITIONS_TTL', '300'))
+DISK_USAGE_TTL = float(os.environ.get('MONITOR_DISK_USAGE_TTL', '30'))
+collector_cache = TTLCache()
+# Uso de cada punto de montaje, por ruta; aparte para poder olvidar los desmontados
+disk_usage_cache = TTLCache()
+
+# Plazo de cada ronda de recolección: techo de la latencia de una muestra
+COLLECTOR_TIMEOUT = float(os.environ.get('MONITOR_COLLECTOR_TIMEOUT', '0.5'))
+
+def get_ip_address(hostname):
+    return socket.gethostbyname(hostname)
+
+def get_os_info():
+    return platform.system() + " " + platform.release()
+
+# Valores con los que arranca un recolector que aún no ha respondido nunca
+EmptyMemory = namedtuple('EmptyMemory', 'total available percent used free')
+EmptySwap = namedtuple('EmptySwap', 'total used free percent sin sout')
+
+# Datos del equipo que no cambian y se obtienen al instante. Se leen una sola
+# vez y fuera del pool, así que un recolector atrasado nunca los deja en blanco.
+def host_facts():
+    return {
+        "os": collector_cache.get('os', get_os_info, None),
+        "boot_time": collector_cache.get('boot_time', psutil.boot_time, None),
+        "cpu_count": collector_cache.get('cpu_count', psutil.cpu_count, None)
+    }
+
+# Recolectores aislados: cada uno corre como tarea independiente con su plazo
+@stats.timed('collector.host')
+def collect_host():
+    hostname = collector_cache.get('hostname', socket.gethostname, None)
+    return {
+        "name": hostname,
+        # La resolución DNS puede tardar: se hace en segundo plano, sin esperarla,
+        # y mientras tanto se muestra N/A
+        "ip": collector_cache.get('ip', partial(get_ip_address, hostname), None, default='N/A')
+    }
+
+# Uso de CPU desde la lectura anterior, que hace el muestreador
+cpu_usage = CpuUsage()
+
+@stats.timed('collector.cpu')
+def collect_cpu():
+    cpu_percent, per_cpu, cpu_times = cpu_usage.update(psutil.cpu_times(percpu=True))
+    return {
+        "cpu_percent": cpu_percent,
+        "per_cpu": per_cpu,
+        "cpu_times": cpu_times,
+        "load_avg": psutil.getloadavg() if hasattr(psutil, 'getloadavg') else (0, 0, 0)
+    }
+
+@stats.timed('collector.memory')
+def collect_memory():
+    return {
+        "memory": psutil.virtual_memory(),
+        "swap": psutil.swap_memory()
+    }
+
+@stats.timed('collector.disks')
+def collect_disks():
+    # Las primeras cargas se esperan como mucho la mitad del plazo de la ronda,
+    # entre todas: lo que no llegue a tiempo aparece en la muestra siguiente
+    deadline = time.monotonic() + COLLECTOR_TIMEOUT / 2
+    disks = collector_cache.get('partitions', psutil.disk_partitions, PARTITIONS_TTL, default=[],
+                                wait=COLLECTOR_TIMEOUT / 2)
+    disk_usage = {}
+
+    # Cada punto de montaje tiene su propia entrada: uno colgado no bloquea a los demás
+    for disk in disks:
+        usage = disk_usage_cache.get(disk.mountpoint, partial(psutil.disk_usage, disk.mountpoint),
+                                     DISK_USAGE_TTL, default=None, wait=max(0.0, deadline - time.monotonic()))
+        if usage is None:
+            continue
+        disk_usage[disk.device] = usage
+    mountpoints = {disk.mountpoint for disk in disks}
+    disk_usage_cache.prune(lambda mountpoint: mountpoint in mountpoints)
+    return disk_usage
+
+@stats.timed('collector.sensors')
+def collect_sensors():
+    temperature = psutil.sensors_temperatures() if hasattr(psutil, 'sensors_temperatures') else {'coretemp': [{'current': 'N/A'}]}
+    return temperature['coretemp'][0]['current'] if 'coretemp' in temperature and temperature['coretemp'] else 'N/A'
+
+SERVER_COLLECTORS = {
+    'host': collect_host,
+    'cpu': collect_cpu,
+    'memory': collect_memory,
+    'disks': collect_disks,
+    'sensors': collect_sensors
+}
+
+COLLECTOR_DEFAULTS = {
+    'host': {"name": socket.gethostname(), "ip": 'N/A'},
+    'cpu': {"cpu_percent": 0.0, "per_cpu": [], "cpu_times": {}, "load_avg": (0, 0, 0)},
+    'memory': {"memory": EmptyMemory(0, 0, 0.0, 0, 0), "swap": EmptySwap(0, 0, 0, 0.0, 0, 0)},
+    'disks': {},
+    'sensors': 'N/A',
+    'network': {"bytes_sent": 0.0, "bytes_recv": 0.0, "interfaces": {}},
+    'disk_io': {}
+}
+
+collector_pool = DeadlineExecutor()
+
+# Recolectores que responden a tiempo desde la caché, pero con un refresco
+# colgado más de un plazo de ronda: lo que sirven es el último valor conocido
+def overdue_collectors():
+    stale = set()
+    if 'partitions' in collector_cache.overdue(COLLECTOR_TIMEOUT) or disk_usage_cache.overdue(COLLECTOR_TIMEOUT):
+        stale.add('disks')
+    return stale
+
+# Componer la información del servidor a partir de los resultados de los recolectores
+def build_server_info(results, stale):
+    host = results['host']
+    facts = host_facts()
+    bt = datetime.fromtimestamp(facts['boot_time'])
+    uptime = datetime.now() - bt
+
+    return {
+        "name": host['name'],
+        "ip": host['ip'],
+        "os": facts['os'],
+        "status": "Encendido",
+        "memory": results['memory']['memory'],
+        "swap": results['memory']['swap'],
+        "disk_usage": results['disks'],
+        "cpu_percent": results['cpu']['cpu_percent'],
+        "per_cpu": results['cpu']['per_cpu'],
+        "cpu_times": results['cpu']['cpu_times'],
+        "cpu_count": facts['cpu_count'],
+        "load_avg": results['cpu']['load_avg'],
+        "uptime": str(uptime).split('.')[0],  # Remover microsegundos
+        "boot_time": facts['boot_time'],
+        "temperature": results['sensors'],
+        # Recolectores que no respondieron a tiempo: sus datos son los últimos conocidos
+        "stale": sorted(name for name in stale if name in SERVER_COLLECTORS)
+    }
+
+# Función para obtener la información del servidor local
+@stats.timed('get_local_server_info')
+def get_local_server_info():
+    results, stale = collector_pool.run(SERVER_COLLECTORS, COLLECTOR_TIMEOUT, COLLECTOR_DEFAULTS)
+    return build_server_info(results, stale | overdue_collectors())
+
+@stats.timed('get_network_info')
+def get_network_info():
+    net_io = psutil.net_io_counters()
+    pernic = psutil.net_io_counters(pernic=True)
+    return {
+        "bytes_sent": net_io.bytes_sent / (1024 ** 2),  # Convertir a MB
+        "bytes_recv": net_io.bytes_recv / (1024 ** 2),  # Convertir a MB
+        # Contadores acumulados por interfaz, en bytes y paquetes
+        "interfaces": {nic: {
+            "bytes_sent": counters.bytes_sent,
+            "bytes_recv": counters.bytes_recv,
+            "packets_sent": counters.packets_sent,
+            "packets_recv": counters.packets_recv
+        } for nic, counters in pernic.items()}
+    }
+
+# Contadores acumulados de E/S por disco
+@stats.timed('get_disk_io_info')
+def get_disk_io_info():
+    disks = psutil.disk_io_counters(perdisk=True) or {}
+    return {disk: {
+        "read_count": counters.read_count,
+        "write_count": counters.write_count,
+        "read_bytes": counters.read_bytes,
+        "write_bytes": counters.write_bytes
+    } for disk, counters in disks.items()}
+
+# Disco completo y no partición: en Linux solo los dispositivos completos
+# aparecen en /sys/block (el mismo criterio que usa psutil para su total)
+@lru_cache(maxsize=None)
+def is_whole_disk(name):
+    if not os.path.isdir('/sys/block'):
+        return True
+    return os.path.exists(os.path.join('/sys/block', name.replace('/', '!')))
+
+# Velocidades a partir de las diferencias entre muestras consecutivas; los
+# contadores de red y disco de psutil son de 32 bits en algunas plataformas
+counter_rates = CounterRates(wrap32=True)
+
+# Los totales se suman a partir de las velocidades por interfaz y por disco: los
+# contadores agregados de psutil bajan cuando desaparece una interfaz (un veth
+# de un contenedor), y su diferencia se leería como un pico enorme.
+def get_rates(timestamp, network, disk_io):
+    interfaces = {}
+    for nic, counters in network['interfaces'].items():
+        rate = counter_rates.update(('net', nic), timestamp, counters)
+        interfaces[nic] = {
+            'sent': rate['bytes_sent'],
+            'recv': rate['bytes_recv'],
+            'packets_sent': rate['packets_sent'],
+            'packets_recv': rate['packets_recv']
+        }
+    disks = {}
+    for disk, counters in disk_io.items():
+        rate = counter_rates.update(('disk', disk), timestamp, counters)
+        disks[disk] = {
+            'read_rate': rate['read_bytes'],
+            'write_rate': rate['write_bytes'],
+            'read_iops': rate['read_count'],
+            'write_iops': rate['write_count']
+        }
+    counter_rates.retain([('net', nic) for nic in interfaces] + [('disk', disk) for disk in disks])
+    # Las particiones se omiten del total: sus bytes ya cuentan en el disco completo
+    whole = [rate for disk, rate in disks.items() if is_whole_disk(disk)]
+    return {
+        'network': {key: sum(rate[key] for rate in interfaces.values()) for key in ('sent', 'recv')},
+        'interfaces': interfaces,
+        'disk_total': {key: sum(rate[key] for rate in whole)
+                       for key in ('read_rate', 'write_rate', 'read_iops', 'write_iops')},
+        'disks': disks
+    }
+
+# Recolectar una muestra completa; la ejecuta el hilo del muestreador
+last_rates = None
+
+@stats.timed('sampler.tick')
+def collect_sample():
+    global last_rates
+
+    timestamp = time.time()
+    tasks = dict(SERVER_COLLECTORS, network=get_network_info, disk_io=get_disk_io_info)
+    results, stale = collector_pool.run(tasks, COLLECTOR_TIMEOUT, COLLECTOR_DEFAULTS)
+    stale |= overdue_collectors()
+    network = results['network']
+    disk_io = results['disk_io']
+    # Con contadores obsoletos la diferencia sería cero: se repiten las últimas velocidades
+    if last_rates is None or not stale & {'network', 'disk_io'}:
+        last_rates = get_rates(timestamp, network, disk_io)
+    return {
+        'time': timestamp,
+        'server': build_server_info(results, stale),
+        'network': network,
+        'disk_io': disk_io,
+        'rates': last_rates,
+        'collectors': sorted(tasks),
+        'stale': sorted(stale)
+    }
@@ -0,0 +1,97 @@
+import math
+import threading
+
+import numpy as np
+
+
+# Historial circular de vectores de ancho fijo sobre una matriz NumPy
+# preasignada: una fila por muestra y una columna por elemento (núcleo, modo
+# de CPU, métrica de un cgroup...). Con float32, una hora de un host de 128
+# núcleos a 1 s ocupa menos de 2 MB. Un escritor y lectores concurrentes.
+class MatrixHistory:
+    def __init__(self, columns, capacity, dtype=np.float32):
+        self.capacity = capacity
+        self.dtype = dtype
+        self.count = 0  # Total de filas escritas desde el arranque
+        self._lock = threading.Lock()
+        self._allocate(columns)
+
+    def _allocate(self, columns):
+        self.columns = tuple(columns)
+        self._times = np.zeros(self.capacity, np.float64)
+        self._values = np.zeros((self.capacity, len(self.columns)), self.dtype)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def nbytes(self):
+        return self._times.nbytes + self._values.nbytes
+
+    # Cambiar las columnas (p. ej. CPUs conectadas en caliente) descartando el historial
+    def reset(self, columns):
+        with self._lock:
+            self._allocate(columns)
+            self.count = 0
+
+    # `row`: valores en el orden de `columns`
+    def append(self, timestamp, row):
+        with self._lock:
+            index = self.count % self.capacity
+            self._times[index] = timestamp
+            self._values[index] = row
+            self.count += 1
+
+    # Índices físicos de las `n` últimas filas en orden cronológico
+    def _order(self, n):
+        n = min(n, len(self))
+        stop = self.count % self.capacity
+        if n <= stop:
+            return slice(stop - n, stop)
+        return np.r_[self.capacity - (n - stop):self.capacity, 0:stop]
+
+    # (marcas de tiempo, matriz filas x columnas) de las `n` últimas filas
+    def last(self, n):
+        with self._lock:
+            order = self._order(n)
+            return self._times[order].copy(), self._values[order].copy()
+
+    # Filas con marca de tiempo en [start, end)
+    def between(self, start, end):
+        with self._lock:
+            order = self._order(len(self))
+            times = self._times[order]
+            lo, hi = np.searchsorted(times, (start, end))
+            rows = slice(order.start + lo, order.start + hi) if isinstance(order, slice) else order[lo:hi]
+            return times[lo:hi].copy(), self._values[rows].copy()
+
+
+# Un MatrixHistory por dispositivo (cgroup, proceso...) creado al aparecer
+class MatrixDeviceHistory:
+    def __init__(self, columns, capacity, dtype=np.float32):
+        self.columns = tuple(columns)
+        self.capacity = capacity
+        self.dtype = dtype
+        self.stores = {}
+
+    def append(self, device, timestamp, values):
+        store = self.stores.get(device)
+        if store is None:
+            store = self.stores[device] = MatrixHistory(self.columns, self.capacity, self.dtype)
+        # Los valores que faltan (p. ej. sin controlador de memoria) quedan como NaN
+        store.append(timestamp, [np.nan if values.get(name) is None else values[name] for name in self.columns])
+
+    # Olvidar los dispositivos que ya no existen
+    def retain(self, devices):
+        for device in self.stores.keys() - set(devices):
+            del self.stores[device]
+
+
+# Valores como lista de floats redondeados para JSON, con None en lugar de NaN
+def nullable_list(values, decimals=2):
+    return [None if math.isnan(value) else value for value in values.astype(np.float64).round(decimals).tolist()]
+
+
+# Columnas de `matrix` como listas para JSON
+def column_lists(columns, matrix, decimals=2):
+    return {name: nullable_list(matrix[:, index], decimals) for index, name in enumerate(columns)}
@@ -0,0 +1,89 @@
+import logging
+import queue
+import threading
+from concurrent.futures import Future, wait
+from functools import partial
+
+logger = logging.getLogger(__name__)
+
+
+# Pool acotado de hilos demonio. A diferencia de ThreadPoolExecutor, sus hilos
+# no se esperan al salir del intérprete: una llamada colgada (un montaje NFS
+# muerto) no impide terminar a cli.py --count ni apagar el worker de gunicorn.
+class DaemonPool:
+    def __init__(self, max_workers, thread_name_prefix):
+        self._max_workers = max_workers
+        self._prefix = thread_name_prefix
+        self._queue = queue.SimpleQueue()
+        self._idle = threading.Semaphore(0)  # Hilos libres esperando trabajo
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        with self._lock:
+            if not self._idle.acquire(blocking=False) and len(self._threads) < self._max_workers:
+                thread = threading.Thread(target=self._worker, daemon=True,
+                                          name='%s_%d' % (self._prefix, len(self._threads)))
+                thread.start()
+                self._threads.append(thread)
+        return future
+
+    def _worker(self):
+        while True:
+            future, fn, args, kwargs = self._queue.get()
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as error:
+                    future.set_exception(error)
+            del future, fn, args, kwargs
+            self._idle.release()
+
+
+# Ejecuta cada recolector como una tarea aislada en un pool acotado, con un
+# plazo común por ronda. Un recolector que no termina a tiempo (o falla)
+# devuelve su último valor conocido marcado como obsoleto, y no se vuelve a
+# lanzar mientras la ejecución anterior siga colgada.
+class DeadlineExecutor:
+    def __init__(self, workers=8):
+        self._pool = DaemonPool(workers, 'collector')
+        self._last = {}     # nombre -> último valor correcto
+        self._running = {}  # nombre -> futuro todavía sin terminar
+        self._lock = threading.RLock()
+
+    # Lanzar `tasks` (nombre -> función) y esperar como mucho `timeout` segundos.
+    # Devuelve los resultados y el conjunto de nombres obsoletos.
+    def run(self, tasks, timeout, defaults=None):
+        defaults = defaults or {}
+        futures = {}
+        with self._lock:
+            for name, task in tasks.items():
+                if name in self._running:
+                    continue
+                future = self._running[name] = self._pool.submit(task)
+                future.add_done_callback(partial(self._done, name))
+                futures[name] = future
+        wait(futures.values(), timeout=timeout)
+
+        results = {}
+        stale = set()
+        for name in tasks:
+            future = futures.get(name)
+            if future is not None and future.done() and future.exception() is None:
+                results[name] = future.result()
+            else:
+                stale.add(name)
+                with self._lock:
+                    results[name] = self._last.get(name, defaults.get(name))
+        return results, stale
+
+    def _done(self, name, future):
+        error = future.exception()
+        with self._lock:
+            self._running.pop(name, None)
+            if error is None:
+                self._last[name] = future.result()
+        if error is not None:
+            logger.warning('El recolector %s ha fallado: %r', name, error)
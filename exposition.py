@@ -0,0 +1,105 @@
+# Formato de exposición de texto de Prometheus/OpenMetrics
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Acumula familias de métricas y genera el cuerpo de texto
+class MetricsWriter:
+    def __init__(self, prefix='monitor_'):
+        self.prefix = prefix
+        self._lines = []
+
+    def family(self, name, kind, help_text, samples):
+        name = self.prefix + name
+        self._lines.append('# HELP %s %s' % (name, help_text))
+        self._lines.append('# TYPE %s %s' % (name, kind))
+        for labels, value in samples:
+            if labels:
+                rendered = ','.join('%s="%s"' % (key, _escape(val)) for key, val in labels.items())
+                self._lines.append('%s{%s} %r' % (name, rendered, float(value)))
+            else:
+                self._lines.append('%s %r' % (name, float(value)))
+
+    def render(self):
+        return '\n'.join(self._lines) + '\n'
+
+
+# Métricas de una muestra del servidor local, del top de procesos y, si se
+# leen, de los cgroups
+def render_metrics(sample, processes, cgroups=None):
+    server = sample['server']
+    network = sample['network']
+    w = MetricsWriter()
+
+    w.family('up', 'gauge', 'Monitor en marcha', [({'host': server['name']}, 1)])
+    w.family('collector_stale', 'gauge', 'Recolector sin respuesta en plazo (1) o al día (0)', [
+        ({'collector': name}, name in sample['stale']) for name in sample['collectors']
+    ])
+    w.family('cpu_percent', 'gauge', 'Uso total de CPU en porcentaje', [({}, server['cpu_percent'])])
+    w.family('cpu_core_percent', 'gauge', 'Uso de CPU por núcleo en porcentaje', [
+        ({'core': core}, value) for core, value in enumerate(server['per_cpu'])
+    ])
+    w.family('cpu_mode_percent', 'gauge', 'Reparto del tiempo de CPU por modo en porcentaje', [
+        ({'mode': mode}, value) for mode, value in server['cpu_times'].items()
+    ])
+    w.family('cpu_count', 'gauge', 'Número de CPUs lógicas', [({}, server['cpu_count'] or 0)])
+    w.family('load_average', 'gauge', 'Carga promedio del sistema', [
+        ({'period': period}, value) for period, value in zip(('1m', '5m', '15m'), server['load_avg'])
+    ])
+    w.family('memory_bytes', 'gauge', 'Memoria RAM en bytes', [
+        ({'type': key}, getattr(server['memory'], key)) for key in ('total', 'used', 'available')
+    ])
+    w.family('swap_bytes', 'gauge', 'Memoria de intercambio en bytes', [
+        ({'type': key}, getattr(server['swap'], key)) for key in ('total', 'used', 'free')
+    ])
+    w.family('boot_time_seconds', 'gauge', 'Hora de arranque del sistema (epoch)', [({}, server['boot_time'])])
+    if isinstance(server['temperature'], (int, float)):
+        w.family('temperature_celsius', 'gauge', 'Temperatura de la CPU', [({}, server['temperature'])])
+    w.family('disk_bytes', 'gauge', 'Espacio en disco en bytes', [
+        ({'device': device, 'type': key}, getattr(usage, key))
+        for device, usage in server['disk_usage'].items() for key in ('total', 'used', 'free')
+    ])
+    w.family('network_bytes_total', 'counter', 'Bytes de red desde el arranque', [
+        ({'direction': 'sent'}, network['bytes_sent'] * 1024 ** 2),
+        ({'direction': 'recv'}, network['bytes_recv'] * 1024 ** 2)
+    ])
+    w.family('network_interface_bytes_total', 'counter', 'Bytes de red por interfaz', [
+        ({'interface': nic, 'direction': direction}, counters['bytes_' + direction])
+        for nic, counters in network['interfaces'].items() for direction in ('sent', 'recv')
+    ])
+    w.family('network_interface_packets_total', 'counter', 'Paquetes de red por interfaz', [
+        ({'interface': nic, 'direction': direction}, counters['packets_' + direction])
+        for nic, counters in network['interfaces'].items() for direction in ('sent', 'recv')
+    ])
+    disks = sample['disk_io'].items()
+    w.family('disk_io_bytes_total', 'counter', 'Bytes leídos y escritos por disco', [
+        ({'disk': disk, 'direction': direction}, counters[direction + '_bytes'])
+        for disk, counters in disks for direction in ('read', 'write')
+    ])
+    w.family('disk_io_operations_total', 'counter', 'Operaciones de lectura y escritura por disco', [
+        ({'disk': disk, 'direction': direction}, counters[direction + '_count'])
+        for disk, counters in disks for direction in ('read', 'write')
+    ])
+
+    def labels(proc):
+        return {'pid': proc['pid'], 'name': proc['name'], 'user': proc['username'] or ''}
+
+    w.family('process_cpu_percent', 'gauge', 'Uso de CPU de los procesos principales',
+             [(labels(proc), proc['cpu_percent']) for proc in processes])
+    w.family('process_memory_percent', 'gauge', 'Uso de memoria de los procesos principales',
+             [(labels(proc), proc['memory_percent']) for proc in processes])
+    if cgroups is not None:
+        w.family('cgroup_cpu_cores', 'gauge', 'Uso de CPU de cada cgroup en núcleos', [
+            ({'cgroup': group}, values['cpu_cores']) for group, values in cgroups.items()
+        ])
+        w.family('cgroup_cpu_throttled_ratio', 'gauge', 'Segundos de espera por cuota de CPU por segundo', [
+            ({'cgroup': group}, values['throttled']) for group, values in cgroups.items()
+        ])
+        w.family('cgroup_memory_bytes', 'gauge', 'Memoria usada por cada cgroup', [
+            ({'cgroup': group}, values['memory_bytes'])
+            for group, values in cgroups.items() if values['memory_bytes'] is not None
+        ])
+    return w.render()
@@ -0,0 +1,20 @@
+# Configuración de gunicorn para `gunicorn -c gunicorn.conf.py wsgi:app`
+import os
+
+bind = os.environ.get('MONITOR_BIND', '0.0.0.0:%s' % os.environ.get('MONITOR_PORT', '5000'))
+
+# Un único worker: la aplicación guarda estado en memoria (muestreadores,
+# historial, tabla de procesos, alertas) y las secuencias de las ETag y de
+# /data?since son propias del proceso. Con varios workers se muestrearía y
+# se alertaría una vez por worker, y un cliente que cambiara de worker
+# recibiría 304 falsos o puntos repetidos. La concurrencia la dan los hilos.
+workers = 1
+
+# Hilos del worker: cada cliente de /stream ocupa uno mientras está conectado.
+# monitor.py admite como mucho MONITOR_MAX_STREAMS flujos (por defecto la
+# mitad de los hilos) y responde 503 al resto, que pasan a sondear /data.
+worker_class = 'gthread'
+threads = int(os.environ.get('MONITOR_THREADS', '16'))
+
+keepalive = 5
+accesslog = os.environ.get('MONITOR_ACCESS_LOG')
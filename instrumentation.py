@@ -0,0 +1,170 @@
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+import psutil
+
+# Límites de los cubos de duración: de 10 µs a ~10 s, duplicando
+BUCKETS = tuple(1e-5 * 2 ** i for i in range(21))
+
+
+# Histograma de duraciones con cubos fijos: registrar cuesta O(log cubos)
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    # Percentil aproximado: límite superior del cubo donde cae
+    def percentile(self, q):
+        target = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return BUCKETS[index] if index < len(BUCKETS) else self.max
+        return 0.0
+
+    def summary(self):
+        with self._lock:
+            return {
+                'count': self.count,
+                'total_ms': self.total * 1000,
+                'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+                'p50_ms': self.percentile(0.5) * 1000,
+                'p90_ms': self.percentile(0.9) * 1000,
+                'p99_ms': self.percentile(0.99) * 1000,
+                'max_ms': self.max * 1000
+            }
+
+
+# Registro de histogramas por nombre y del consumo del propio proceso
+class Instrumentation:
+    def __init__(self):
+        self.started = time.time()
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._process = psutil.Process()
+        self._process.cpu_percent(None)
+        self._usage = {'cpu_percent': 0.0, 'cpu_percent_max': 0.0, 'rss_bytes': 0, 'rss_bytes_max': 0}
+
+    def histogram(self, name):
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram())
+        return histogram
+
+    @contextmanager
+    def timer(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name).observe(time.perf_counter() - started)
+
+    # Decorador que mide cada llamada a la función
+    def timed(self, name):
+        def decorator(func):
+            histogram = self.histogram(name)
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    # Tras un fork (p. ej. un worker de gunicorn) medir el proceso hijo
+    def _current(self):
+        if self._process.pid != os.getpid():
+            self.started = time.time()
+            self._process = psutil.Process()
+            self._process.cpu_percent(None)
+        return self._process
+
+    # CPU y memoria del propio monitor; se llama en cada tick del muestreador
+    def update_process(self, sample=None):
+        process = self._current()
+        cpu = process.cpu_percent(None)
+        rss = process.memory_info().rss
+        usage = self._usage
+        self._usage = {
+            'cpu_percent': cpu,
+            'cpu_percent_max': max(cpu, usage['cpu_percent_max']),
+            'rss_bytes': rss,
+            'rss_bytes_max': max(rss, usage['rss_bytes_max'])
+        }
+
+    def snapshot(self):
+        process = self._current()
+        times = process.cpu_times()
+        uptime = time.time() - self.started
+        usage = dict(self._usage)
+        usage.update({
+            'pid': process.pid,
+            'threads': process.num_threads(),
+            'cpu_seconds': times.user + times.system,
+            'cpu_percent_avg': (times.user + times.system) / uptime * 100 if uptime else 0.0,
+            'uptime_seconds': uptime
+        })
+        return {
+            'process': usage,
+            'timings': {name: histogram.summary() for name, histogram in sorted(self._histograms.items())}
+        }
+
+
+# Perfilador por muestreo: cada `interval` segundos toma la pila de todos los
+# hilos y cuenta las pilas repetidas en formato "collapsed" (el que leen
+# flamegraph.pl y speedscope).
+class SamplingProfiler:
+    def __init__(self, interval=0.005):
+        self.interval = interval
+
+    @staticmethod
+    def _frame_name(frame):
+        code = frame.f_code
+        return '%s:%s' % (os.path.basename(code.co_filename), code.co_name)
+
+    def run(self, seconds):
+        stacks = Counter()
+        me = threading.get_ident()
+        names = {}
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_name(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, 'thread-%d' % ident))
+                stacks[';'.join(reversed(stack))] += 1
+            time.sleep(self.interval)
+        return stacks
+
+    @staticmethod
+    def collapsed(stacks):
+        return ''.join('%s %d\n' % (stack, count) for stack, count in stacks.most_common())
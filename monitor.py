@@ -1,82 +1,201 @@
-import psutil
-import socket
-import platform
-from datetime import datetime, timedelta
-from flask import Flask, jsonify, render_template_string
-
-app = Flask(__name__)
-
-# Variables para almacenar los datos históricos
-ram_history = []
-cpu_history = []
-network_history = []
-
-# Función para obtener la información del servidor local
-def get_local_server_info():
-    hostname = socket.gethostname()
-    ip_address = socket.gethostbyname(hostname)
-    os_info = platform.system() + " " + platform.release()
-    memory = psutil.virtual_memory()
-    swap = psutil.swap_memory()
-    disks = psutil.disk_partitions()
-    disk_usage = {}
-    cpu_percent = psutil.cpu_percent(interval=1)
-    load_avg = psutil.getloadavg() if hasattr(psutil, 'getloadavg') else (0, 0, 0)
-    boot_time_timestamp = psutil.boot_time()
-    bt = datetime.fromtimestamp(boot_time_timestamp)
-    uptime = datetime.now() - bt
-    temperature = psutil.sensors_temperatures() if hasattr(psutil, 'sensors_temperatures') else {'coretemp': [{'current': 'N/A'}]}
-
-    for disk in disks:
-        try:
-            usage = psutil.disk_usage(disk.mountpoint)
-            disk_usage[disk.device] = usage
-        except PermissionError:
-            continue
+import os
+import threading
+import time
+import hashlib
+import tempfile
+from flask import Flask, abort, jsonify, render_template, request
+from werkzeug.serving import is_running_from_reloader
 
-    return {
-        "name": hostname,
-        "ip": ip_address,
-        "os": os_info,
-        "status": "Encendido",
-        "memory": memory,
-        "swap": swap,
-        "disk_usage": disk_usage,
-        "cpu_percent": cpu_percent,
-        "cpu_count": psutil.cpu_count(),
-        "load_avg": load_avg,
-        "uptime": str(uptime).split('.')[0],  # Remover microsegundos
-        "temperature": temperature['coretemp'][0]['current'] if 'coretemp' in temperature and temperature['coretemp'] else 'N/A'
-    }
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
-def get_network_info():
-    net_io = psutil.net_io_counters()
-    return {
-        "bytes_sent": net_io.bytes_sent / (1024 ** 2),  # Convertir a MB
-        "bytes_recv": net_io.bytes_recv / (1024 ** 2)   # Convertir a MB
-    }
+from aggregator import Aggregator
+from analytics import DEFAULT_PERCENTILES, HistoryStats
+from alerts import AlertEngine, WebhookSink, load_rules, log_sink
+from assets import StaticBundle, compress, negotiate
+from cgroups import CGROUP_COLUMNS, CgroupReader, unified_root
+import collectors
+from collectors import collect_sample, stats
+from columnar import MatrixDeviceHistory, MatrixHistory, column_lists
+from exposition import CONTENT_TYPE, render_metrics
+from instrumentation import SamplingProfiler
+from processes import ProcessHistory, ProcessTable
+from rollup import RollupHistory, parse_range
+from sampler import Sampler
+from storage import MetricsArchive
+from streaming import Broadcaster, sse_message
+from timeseries import DeviceHistory, TimeSeriesStore
+
+app = Flask(__name__, static_folder=None)
+
+# Los recolectores viven en collectors.py (sin Flask). Se reexportan aquí
+# para el código que los importaba de monitor (p. ej. bench.py).
+COLLECTOR_DEFAULTS = collectors.COLLECTOR_DEFAULTS
+SERVER_COLLECTORS = collectors.SERVER_COLLECTORS
+get_local_server_info = collectors.get_local_server_info
+get_network_info = collectors.get_network_info
+get_disk_io_info = collectors.get_disk_io_info
+
+# Intervalo de muestreo en segundos (configurable por entorno)
+SAMPLE_INTERVAL = float(os.environ.get('MONITOR_INTERVAL', '1.0'))
+# Los procesos se recorren con su propio intervalo, más lento
+PROCESS_INTERVAL = float(os.environ.get('MONITOR_PROCESS_INTERVAL', '5.0'))
 
+# Modo agregador: lista de agentes "host:puerto" separados por comas
+AGENTS = [address.strip() for address in os.environ.get('MONITOR_AGENTS', '').split(',') if address.strip()]
+AGENT_TIMEOUT = float(os.environ.get('MONITOR_AGENT_TIMEOUT', '2.0'))
+AGENT_INTERVAL = float(os.environ.get('MONITOR_AGENT_INTERVAL', str(SAMPLE_INTERVAL)))
+
+# Retención del historial en segundos (por defecto 24 h) y puntos enviados al panel
+HISTORY_RETENTION = float(os.environ.get('MONITOR_RETENTION', '86400'))
+HISTORY_POINTS = 20
+MAX_QUERY_POINTS = 2000
+# Retención del historial por interfaz y por disco (más corta: hay uno por dispositivo)
+DEVICE_RETENTION = float(os.environ.get('MONITOR_DEVICE_RETENTION', '3600'))
+
+# Historial en buffers circulares preasignados, alimentado por el muestreador.
+# Las velocidades de red y disco están en bytes (u operaciones) por segundo.
+history = TimeSeriesStore(
+    ['ram', 'cpu', 'net_sent_rate', 'net_recv_rate',
+     'disk_read_rate', 'disk_write_rate', 'disk_read_iops', 'disk_write_iops'],
+    capacity=max(HISTORY_POINTS, int(HISTORY_RETENTION / SAMPLE_INTERVAL))
+)
+device_capacity = max(HISTORY_POINTS, int(DEVICE_RETENTION / SAMPLE_INTERVAL))
+interface_history = DeviceHistory(['sent', 'recv', 'packets_sent', 'packets_recv'], device_capacity)
+disk_io_history = DeviceHistory(['read_rate', 'write_rate', 'read_iops', 'write_iops'], device_capacity)
+# Uso por núcleo y reparto del tiempo de CPU por modo, en matrices NumPy (float32)
+CPU_MODES = ('user', 'system', 'iowait', 'steal', 'nice', 'irq', 'softirq', 'idle')
+core_history = MatrixHistory((), device_capacity)
+cpu_mode_history = MatrixHistory(CPU_MODES, device_capacity)
+# Niveles agregados (10 s, 1 min, 10 min) para consultas de rangos largos
+rollups = RollupHistory(history, SAMPLE_INTERVAL)
+
+# Estadísticas vectorizadas sobre el historial, memorizadas hasta la siguiente muestra
+history_stats = HistoryStats(rollups)
+
+# Persistencia opcional en disco: directorio de segmentos y retención de las muestras crudas
+DATA_DIR = os.environ.get('MONITOR_DATA_DIR')
+ARCHIVE_RETENTION = float(os.environ.get('MONITOR_ARCHIVE_RETENTION', str(7 * 86400)))
+archive = None
+if DATA_DIR:
+    archive = MetricsArchive(DATA_DIR, history, rollups, ARCHIVE_RETENTION)
+    archive.restore()
+
+# Top de procesos leído de la tabla que mantiene su propio muestreador
+@stats.timed('get_top_processes')
 def get_top_processes():
-    processes = []
-    for proc in psutil.process_iter(['pid', 'name', 'username', 'cpu_percent', 'memory_percent', 'status']):
-        processes.append(proc.info)
-    # Ordenar los procesos por uso de CPU y memoria
-    processes = sorted(processes, key=lambda x: (x['cpu_percent'], x['memory_percent']), reverse=True)[:10]
-    return processes
+    return process_sampler.latest()['processes']
 
-# Ruta para la página principal
-@app.route('/')
-def index():
-    server_info = [get_local_server_info()]
-    return render_template_string('''
+# Guardar cada muestra en el historial
+def record_sample(sample):
+    rates = sample['rates']
+    values = {
+        'ram': sample['server']['memory'].used / (1024 ** 3),
+        'cpu': sample['server']['cpu_percent'],
+        'net_sent_rate': rates['network']['sent'],
+        'net_recv_rate': rates['network']['recv'],
+        'disk_read_rate': rates['disk_total']['read_rate'],
+        'disk_write_rate': rates['disk_total']['write_rate'],
+        'disk_read_iops': rates['disk_total']['read_iops'],
+        'disk_write_iops': rates['disk_total']['write_iops']
+    }
+    history.append(sample['time'], values)
+    rollups.add(sample['time'], values)
+    if archive is not None:
+        archive.append(sample['time'], values)
+    for nic, rate in rates['interfaces'].items():
+        interface_history.append(nic, sample['time'], rate)
+    for disk, rate in rates['disks'].items():
+        disk_io_history.append(disk, sample['time'], rate)
+
+    per_cpu = sample['server']['per_cpu']
+    if per_cpu:
+        if len(per_cpu) != len(core_history.columns):
+            core_history.reset([str(core) for core in range(len(per_cpu))])
+        core_history.append(sample['time'], per_cpu)
+    cpu_times = sample['server']['cpu_times']
+    if cpu_times:
+        cpu_mode_history.append(sample['time'], [cpu_times.get(mode, 0.0) for mode in CPU_MODES])
+
+sampler = Sampler(collect_sample, interval=SAMPLE_INTERVAL)
+sampler.subscribe(record_sample)
+sampler.subscribe(stats.update_process)
+
+# Alertas evaluadas con cada muestra. MONITOR_ALERT_RULES: archivo JSON con la
+# lista de reglas (por defecto, alerts.DEFAULT_RULES); MONITOR_ALERT_WEBHOOK:
+# URL a la que se envían las alertas disparadas y resueltas, además del log.
+alert_sinks = [log_sink]
+if os.environ.get('MONITOR_ALERT_WEBHOOK'):
+    alert_sinks.append(WebhookSink(os.environ['MONITOR_ALERT_WEBHOOK']))
+alert_engine = AlertEngine(load_rules(os.environ.get('MONITOR_ALERT_RULES')), alert_sinks)
+sampler.subscribe(stats.timed('alerts.evaluate')(alert_engine.evaluate))
+
+# Historial corto (MONITOR_PROCESS_HISTORY ticks) de los procesos que entran en el top
+process_history = ProcessHistory(points=int(os.environ.get('MONITOR_PROCESS_HISTORY', '60')))
+process_table = ProcessTable(top=10, history=process_history)
+process_sampler = Sampler(stats.timed('process_table.update')(process_table.update), interval=PROCESS_INTERVAL)
+
+# CPU y memoria de los cgroups v2 (contenedores y slices de systemd) hasta
+# MONITOR_CGROUP_DEPTH niveles, leídos cada MONITOR_CGROUP_INTERVAL segundos
+CGROUP_INTERVAL = float(os.environ.get('MONITOR_CGROUP_INTERVAL', '5'))
+cgroup_root = unified_root()
+cgroup_reader = CgroupReader(cgroup_root, depth=int(os.environ.get('MONITOR_CGROUP_DEPTH', '2'))) if cgroup_root else None
+cgroup_history = MatrixDeviceHistory(CGROUP_COLUMNS, max(HISTORY_POINTS, int(DEVICE_RETENTION / CGROUP_INTERVAL)))
+cgroup_sampler = Sampler(stats.timed('cgroups.update')(cgroup_reader.update), interval=CGROUP_INTERVAL) if cgroup_reader else None
+
+def record_cgroups(sample):
+    for group, values in sample['groups'].items():
+        cgroup_history.append(group, sample['time'], values)
+    cgroup_history.retain(sample['groups'])
+
+if cgroup_sampler is not None:
+    cgroup_sampler.subscribe(record_cgroups)
+
+# Agentes remotos consultados en paralelo con su propio muestreador
+aggregator = Aggregator(AGENTS, timeout=AGENT_TIMEOUT) if AGENTS else None
+agent_sampler = Sampler(stats.timed('aggregator.poll')(aggregator.poll), interval=AGENT_INTERVAL) if aggregator else None
+
+# Entradas de los agentes para la lista de servidores (`key`: 'info' o 'data')
+def agent_servers(key):
+    if aggregator is None:
+        return []
+    servers = []
+    for host in aggregator.hosts():
+        if host['payload'] is None:
+            servers.append({'name': host['address'], 'status': host['status']})
+        else:
+            servers.append(dict(host['payload'][key], status=host['status']))
+    return servers
+
+# Arrancar todos los muestreadores sin esperar a la primera petición: las
+# alertas y el archivo de MONITOR_DATA_DIR no pueden depender de que alguien
+# abra el panel o consulte /metrics
+def start_samplers():
+    for each in (sampler, process_sampler, cgroup_sampler, agent_sampler):
+        if each is not None:
+            each.start()
+
+# Última instantánea disponible (arranca los muestreadores la primera vez si
+# nadie lo ha hecho antes, p. ej. con el cliente de pruebas de Flask)
+def get_snapshot():
+    if agent_sampler is not None:
+        agent_sampler.latest()
+    if cgroup_sampler is not None:
+        cgroup_sampler.latest()
+    return sampler.latest()
+
+# Plantilla de la página principal, compilada una sola vez al importar
+INDEX_TEMPLATE = app.jinja_env.from_string('''
     <!DOCTYPE html>
     <html lang="es">
     <head>
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>Monitorización de Servidor Local</title>
-        <link href="https://cdnjs.cloudflare.com/ajax/libs/materialize/1.0.0/css/materialize.min.css" rel="stylesheet">
-        <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/5.15.4/css/all.min.css" rel="stylesheet">
+        <link href="{{ vendor.url('materialize.min.css') }}" rel="stylesheet">
+        <link href="{{ vendor.url('fontawesome/css/all.min.css') }}" rel="stylesheet">
         <style>
             body {
                 background-color: #f5f5f5;
@@ -171,79 +290,173 @@ def index():
                 color: white;
             }
         </style>
-        <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
+        <script src="{{ vendor.url('chart.umd.min.js') }}"></script>
         <script>
+            const HISTORY_POINTS = {{ history_points }};
+            let state = null; // Último estado completo recibido
+
             function refreshData() {
                 fetch('/data')
                     .then(response => response.json())
-                    .then(data => {
-                        // Actualizar gráfico de RAM
-                        let ramChart = window['ramChart'];
-                        ramChart.data.labels = data.labels;
-                        ramChart.data.datasets[0].data = data.servers[0].ram;
-                        ramChart.update();
-                        document.getElementById('ramUsage').innerText = data.servers[0].ram[data.servers[0].ram.length - 1].toFixed(1) + ' GB Usado';
-                        document.getElementById('ramFree').innerText = data.servers[0].ram_free.toFixed(1) + ' GB Libre';
-
-                        // Actualizar gráfico de CPU
-                        let cpuChart = window['cpuChart'];
-                        cpuChart.data.labels = data.labels;
-                        cpuChart.data.datasets[0].data = data.servers[0].cpu;
-                        cpuChart.update();
-                        document.getElementById('cpuUsage').innerText = data.servers[0].cpu[data.servers[0].cpu.length - 1].toFixed(1) + '% Usado';
-                        document.getElementById('cpuFree').innerText = (100 - data.servers[0].cpu[data.servers[0].cpu.length - 1]).toFixed(1) + '% Libre';
-
-                        // Actualizar gráfico de red
-                        let networkChart = window['networkChart'];
-                        networkChart.data.labels = data.labels;
-                        networkChart.data.datasets[0].data = data.servers[0].network.map(n => n.sent);
-                        networkChart.data.datasets[1].data = data.servers[0].network.map(n => n.recv);
-                        networkChart.update();
-                        document.getElementById('networkSent').innerText = data.servers[0].network[data.servers[0].network.length - 1].sent.toFixed(1) + ' MB Enviado';
-                        document.getElementById('networkRecv').innerText = data.servers[0].network[data.servers[0].network.length - 1].recv.toFixed(1) + ' MB Recibido';
-
-                        // Actualizar información de discos
-                        data.servers[0].disk_usage.forEach((disk, diskIndex) => {
-                            document.getElementById(`diskUsed${diskIndex}`).innerText = disk.used.toFixed(2) + ' GB Usados';
-                            document.getElementById(`diskFree${diskIndex}`).innerText = disk.free.toFixed(2) + ' GB Libres';
-                            document.getElementById(`diskProgress${diskIndex}`).style.width = (disk.used / (disk.total + disk.free) * 100) + '%';
-                            document.getElementById(`diskProgress${diskIndex}`).className = 'determinate ' + (disk.free / (disk.total + disk.free) * 100 < 5 ? 'red' : '');
-                        });
-
-                        // Actualizar tabla de procesos
-                        let processTableBody = document.getElementById('processTableBody');
-                        processTableBody.innerHTML = '';
-                        data.processes.forEach(proc => {
-                            let row = document.createElement('tr');
-                            row.innerHTML = `
-                                <td>${proc.pid}</td>
-                                <td>${proc.name}</td>
-                                <td>${proc.username}</td>
-                                <td>${proc.cpu_percent.toFixed(1)}</td>
-                                <td>${proc.memory_percent.toFixed(1)}</td>
-                                <td>${proc.status}</td>
-                            `;
-                            processTableBody.appendChild(row);
-                        });
-
-                        // Actualizar otros datos
-                        document.getElementById('uptime').innerText = data.servers[0].uptime;
-                        document.getElementById('temperature').innerText = data.servers[0].temperature + ' °C';
-                        document.getElementById('loadAvg1').innerText = data.servers[0].load_avg[0].toFixed(2);
-                        document.getElementById('loadAvg5').innerText = data.servers[0].load_avg[1].toFixed(2);
-                        document.getElementById('loadAvg15').innerText = data.servers[0].load_avg[2].toFixed(2);
-                        document.getElementById('swapUsed').innerText = (data.servers[0].swap.used / (1024 ** 3)).toFixed(1) + ' GB Usado';
-                        document.getElementById('swapFree').innerText = (data.servers[0].swap.free / (1024 ** 3)).toFixed(1) + ' GB Libre';
+                    .then(renderData);
+            }
+
+            // Aplicar una muestra del flujo al estado y volver a pintar
+            function applySample(update) {
+                let server = state.servers[0];
+                server.ram.push(update.ram);
+                server.cpu.push(update.cpu);
+                server.network.push(update.network);
+                [server.ram, server.cpu, server.network].forEach(series => {
+                    if (series.length > HISTORY_POINTS) series.splice(0, series.length - HISTORY_POINTS);
+                });
+                state.labels = server.labels = server.ram.map((_, i) => i);
+                if (update.changed.processes) {
+                    state.processes = update.changed.processes;
+                    delete update.changed.processes;
+                }
+                Object.assign(server, update.changed);
+                renderData(state);
+            }
+
+            function startPolling() {
+                setInterval(refreshData, 15000); // Refrescar cada 15 segundos
+                refreshData();
+            }
+
+            // Recibir las muestras por Server-Sent Events; si no hay soporte o el
+            // servidor rechaza el flujo (503 con todos los flujos ocupados), sondear
+            function connectStream() {
+                if (!window.EventSource) {
+                    startPolling();
+                    return;
+                }
+                let source = new EventSource('/stream');
+                let lastSample = 0;
+                source.addEventListener('error', () => {
+                    // CONNECTING: reconexión automática; CLOSED: respuesta que no es un flujo
+                    if (source.readyState === EventSource.CLOSED) startPolling();
+                });
+                source.addEventListener('snapshot', event => {
+                    lastSample = Number(event.lastEventId);
+                    renderData(JSON.parse(event.data));
+                });
+                source.addEventListener('sample', event => {
+                    let update = JSON.parse(event.data);
+                    if (!state || update.seq <= lastSample) return;
+                    lastSample = update.seq;
+                    applySample(update);
+                });
+                source.addEventListener('hosts', event => {
+                    if (!state) return;
+                    state.servers.splice(1, state.servers.length - 1, ...JSON.parse(event.data));
+                    renderData(state);
+                });
+            }
+
+            function renderData(data) {
+                state = data;
+                data.servers.forEach((server, s) => {
+                    let card = document.getElementById(`server-${s}`);
+                    if (!card) return;
+                    if (card.dataset.pending !== undefined) {
+                        // El agente respondió por primera vez: recargar para pintar su tarjeta
+                        if (server.ram) location.reload();
+                        return;
+                    }
+                    renderServer(s, server, s === 0 ? data.processes : server.processes);
+                });
+            }
+
+            function renderServer(s, server, processes) {
+                let status = document.getElementById(`status-${s}`);
+                status.innerText = server.status;
+                status.className = server.status === 'Encendido' ? 'status-encendido' : 'status-apagado';
+                let stale = document.getElementById(`stale-${s}`);
+                if (stale) stale.innerText = server.stale && server.stale.length ? ' (sin actualizar: ' + server.stale.join(', ') + ')' : '';
+
+                // Actualizar gráfico de RAM
+                let ramChart = charts[s].ram;
+                ramChart.data.labels = server.labels;
+                ramChart.data.datasets[0].data = server.ram;
+                ramChart.update();
+                document.getElementById(`ramUsage-${s}`).innerText = server.ram[server.ram.length - 1].toFixed(1) + ' GB Usado';
+                document.getElementById(`ramFree-${s}`).innerText = server.ram_free.toFixed(1) + ' GB Libre';
+
+                // Actualizar gráfico de CPU
+                let cpuChart = charts[s].cpu;
+                cpuChart.data.labels = server.labels;
+                cpuChart.data.datasets[0].data = server.cpu;
+                cpuChart.update();
+                document.getElementById(`cpuUsage-${s}`).innerText = server.cpu[server.cpu.length - 1].toFixed(1) + '% Usado';
+                document.getElementById(`cpuFree-${s}`).innerText = (100 - server.cpu[server.cpu.length - 1]).toFixed(1) + '% Libre';
+
+                // Actualizar gráfico de red
+                let networkChart = charts[s].network;
+                networkChart.data.labels = server.labels;
+                networkChart.data.datasets[0].data = server.network.map(n => n.sent);
+                networkChart.data.datasets[1].data = server.network.map(n => n.recv);
+                networkChart.update();
+                document.getElementById(`networkSent-${s}`).innerText = server.network[server.network.length - 1].sent.toFixed(1) + ' KB/s Enviado';
+                document.getElementById(`networkRecv-${s}`).innerText = server.network[server.network.length - 1].recv.toFixed(1) + ' KB/s Recibido';
+
+                // Actualizar información de discos
+                server.disk_usage.forEach((disk, diskIndex) => {
+                    if (!document.getElementById(`diskUsed-${s}-${diskIndex}`)) return;
+                    document.getElementById(`diskUsed-${s}-${diskIndex}`).innerText = disk.used.toFixed(2) + ' GB Usados';
+                    document.getElementById(`diskFree-${s}-${diskIndex}`).innerText = disk.free.toFixed(2) + ' GB Libres';
+                    document.getElementById(`diskProgress-${s}-${diskIndex}`).style.width = (disk.used / (disk.total + disk.free) * 100) + '%';
+                    document.getElementById(`diskProgress-${s}-${diskIndex}`).className = 'determinate ' + (disk.free / (disk.total + disk.free) * 100 < 5 ? 'red' : '');
+                });
+
+                // Actualizar E/S de disco (MB/s)
+                if (server.disk_io_total) {
+                    document.getElementById(`diskRead-${s}`).innerText = (server.disk_io_total.read_rate / (1024 ** 2)).toFixed(2) + ' MB/s';
+                    document.getElementById(`diskWrite-${s}`).innerText = (server.disk_io_total.write_rate / (1024 ** 2)).toFixed(2) + ' MB/s';
+                    document.getElementById(`diskIops-${s}`).innerText = (server.disk_io_total.read_iops + server.disk_io_total.write_iops).toFixed(0);
+                }
+
+                // Actualizar tabla de procesos. Las celdas se rellenan con textContent:
+                // en modo agregador los nombres llegan de agentes remotos y no se
+                // deben interpretar como HTML.
+                let processTableBody = document.getElementById(`processTableBody-${s}`);
+                let rows = processes.map(proc => {
+                    let row = document.createElement('tr');
+                    [
+                        proc.pid,
+                        proc.name,
+                        proc.username,
+                        proc.cpu_percent.toFixed(1),
+                        proc.memory_percent.toFixed(1),
+                        proc.status
+                    ].forEach(value => {
+                        let cell = document.createElement('td');
+                        cell.textContent = value;
+                        row.appendChild(cell);
                     });
+                    return row;
+                });
+                processTableBody.replaceChildren(...rows);
+
+                // Actualizar otros datos
+                document.getElementById(`uptime-${s}`).innerText = server.uptime;
+                document.getElementById(`temperature-${s}`).innerText = server.temperature + ' °C';
+                document.getElementById(`loadAvg1-${s}`).innerText = server.load_avg[0].toFixed(2);
+                document.getElementById(`loadAvg5-${s}`).innerText = server.load_avg[1].toFixed(2);
+                document.getElementById(`loadAvg15-${s}`).innerText = server.load_avg[2].toFixed(2);
+                document.getElementById(`swapUsed-${s}`).innerText = (server.swap.used / (1024 ** 3)).toFixed(1) + ' GB Usado';
+                document.getElementById(`swapFree-${s}`).innerText = (server.swap.free / (1024 ** 3)).toFixed(1) + ' GB Libre';
             }
-            setInterval(refreshData, 15000); // Refrescar cada 15 segundos
 
-            document.addEventListener('DOMContentLoaded', function() {
-                let ctxRam = document.getElementById('ramUsageChart').getContext('2d');
-                let ctxCpu = document.getElementById('cpuUsageChart').getContext('2d');
-                let ctxNetwork = document.getElementById('networkUsageChart').getContext('2d');
+            let charts = []; // Gráficos de cada servidor, por índice
+
+            function createCharts(s) {
+                let ctxRam = document.getElementById(`ramUsageChart-${s}`).getContext('2d');
+                let ctxCpu = document.getElementById(`cpuUsageChart-${s}`).getContext('2d');
+                let ctxNetwork = document.getElementById(`networkUsageChart-${s}`).getContext('2d');
+                charts[s] = {};
 
-                window['ramChart'] = new Chart(ctxRam, {
+                charts[s].ram = new Chart(ctxRam, {
                     type: 'line',
                     data: {
                         labels: [], // Etiquetas vacías iniciales
@@ -267,7 +480,7 @@ def index():
                     }
                 });
 
-                window['cpuChart'] = new Chart(ctxCpu, {
+                charts[s].cpu = new Chart(ctxCpu, {
                     type: 'line',
                     data: {
                         labels: [], // Etiquetas vacías iniciales
@@ -291,7 +504,7 @@ def index():
                     }
                 });
 
-                window['networkChart'] = new Chart(ctxNetwork, {
+                charts[s].network = new Chart(ctxNetwork, {
                     type: 'line',
                     data: {
                         labels: [], // Etiquetas vacías iniciales
@@ -324,8 +537,14 @@ def index():
                         }
                     }
                 });
+            }
 
-                refreshData(); // Inicializar los datos en la carga de la página
+            document.addEventListener('DOMContentLoaded', function() {
+                document.querySelectorAll('.card[data-server]').forEach(card => {
+                    if (card.dataset.pending === undefined) createCharts(card.dataset.server);
+                });
+
+                connectStream(); // Inicializar los datos en la carga de la página
             });
         </script>
     </head>
@@ -333,58 +552,69 @@ def index():
         <div class="container">
             <div class="row">
                 {% for server in servers %}
+                {% set s = loop.index0 %}
                 <div class="col s12 m6 l4">
-                    <div class="card">
+                    {% if server.memory is not defined %}
+                    <!-- Agente que todavía no ha respondido -->
+                    <div class="card" id="server-{{ s }}" data-server="{{ s }}" data-pending>
+                        <div class="card-content">
+                            <span class="card-title">{{ server.name }}</span>
+                            <p><strong>Estado:</strong> <span id="status-{{ s }}" class="status-apagado">{{ server.status }}</span></p>
+                        </div>
+                    </div>
+                    {% else %}
+                    <div class="card" id="server-{{ s }}" data-server="{{ s }}">
                         <div class="card-content">
                             <span class="card-title">{{ server.name }}</span>
                             <p><strong>Dirección IP:</strong> {{ server.ip }} | <strong>Sistema Operativo:</strong> {{ server.os }}</p>
-                            <p><strong>Estado:</strong> <span class="status-encendido">{{ server.status }}</span></p>
-                            <p><strong>Tiempo de Actividad:</strong> <span id="uptime">{{ server.uptime }}</span></p>
-                            <p><strong>Temperatura CPU:</strong> <span id="temperature">{{ server.temperature }} °C</span></p>
-                            <p><strong>Carga Promedio (1 min):</strong> <span id="loadAvg1">{{ server.load_avg[0] }}</span></p>
-                            <p><strong>Carga Promedio (5 min):</strong> <span id="loadAvg5">{{ server.load_avg[1] }}</span></p>
-                            <p><strong>Carga Promedio (15 min):</strong> <span id="loadAvg15">{{ server.load_avg[2] }}</span></p>
+                            <p><strong>Estado:</strong> <span id="status-{{ s }}" class="{% if server.status == 'Encendido' %}status-encendido{% else %}status-apagado{% endif %}">{{ server.status }}</span><span id="stale-{{ s }}"></span></p>
+                            <p><strong>Tiempo de Actividad:</strong> <span id="uptime-{{ s }}">{{ server.uptime }}</span></p>
+                            <p><strong>Temperatura CPU:</strong> <span id="temperature-{{ s }}">{{ server.temperature }} °C</span></p>
+                            <p><strong>Carga Promedio (1 min):</strong> <span id="loadAvg1-{{ s }}">{{ server.load_avg[0] }}</span></p>
+                            <p><strong>Carga Promedio (5 min):</strong> <span id="loadAvg5-{{ s }}">{{ server.load_avg[1] }}</span></p>
+                            <p><strong>Carga Promedio (15 min):</strong> <span id="loadAvg15-{{ s }}">{{ server.load_avg[2] }}</span></p>
                             <p class="icon-text"><i class="fas fa-memory"></i> <strong>RAM Total:</strong> {{ (server.memory.total / (1024 ** 3)) | round(1) }} GB | <i class="fas fa-microchip"></i> <strong>CPUs Totales:</strong> {{ server.cpu_count }}</p>
-                            <p class="icon-text"><strong>Swap Usado:</strong> <span id="swapUsed">{{ (server.swap.used / (1024 ** 3)) | round(1) }} GB</span> | <strong>Swap Libre:</strong> <span id="swapFree">{{ (server.swap.free / (1024 ** 3)) | round(1) }} GB</span></p>
+                            <p class="icon-text"><strong>Swap Usado:</strong> <span id="swapUsed-{{ s }}">{{ (server.swap.used / (1024 ** 3)) | round(1) }} GB</span> | <strong>Swap Libre:</strong> <span id="swapFree-{{ s }}">{{ (server.swap.free / (1024 ** 3)) | round(1) }} GB</span></p>
+                            <p><strong>E/S de Disco:</strong> lectura <span id="diskRead-{{ s }}">0.00 MB/s</span> | escritura <span id="diskWrite-{{ s }}">0.00 MB/s</span> | <span id="diskIops-{{ s }}">0</span> IOPS</p>
                             <span class="card-title">Espacio en Disco</span>
                             {% for disk, usage in server.disk_usage.items() %}
                                 <p><strong>Disco {{ disk }}:</strong> 
-                                    <span id="diskUsed{{ loop.index0 }}">{{ (usage.used / (1024 ** 3)) | round(2) }} GB Usados</span> / 
-                                    <span id="diskFree{{ loop.index0 }}">{{ (usage.free / (1024 ** 3)) | round(2) }} GB Libres</span>
+                                    <span id="diskUsed-{{ s }}-{{ loop.index0 }}">{{ (usage.used / (1024 ** 3)) | round(2) }} GB Usados</span> / 
+                                    <span id="diskFree-{{ s }}-{{ loop.index0 }}">{{ (usage.free / (1024 ** 3)) | round(2) }} GB Libres</span>
                                 </p>
                                 <div class="progress">
-                                    <div id="diskProgress{{ loop.index0 }}" class="determinate {% if (usage.free / usage.total) * 100 < 5 %}red{% endif %}" style="width: {{ (usage.used / usage.total) * 100 }}%;"></div>
+                                    <div id="diskProgress-{{ s }}-{{ loop.index0 }}" class="determinate {% if (usage.free / usage.total) * 100 < 5 %}red{% endif %}" style="width: {{ (usage.used / usage.total) * 100 }}%;"></div>
                                 </div>
                             {% endfor %}
                             <div class="charts-row">
                                 <div class="chart-item">
                                     <span class="card-title">Uso de RAM</span>
                                     <div class="value-display-row">
-                                        <div id="ramUsage" class="value-display">0 GB Usado</div>
-                                        <div id="ramFree" class="value-display">0 GB Libre</div>
+                                        <div id="ramUsage-{{ s }}" class="value-display">0 GB Usado</div>
+                                        <div id="ramFree-{{ s }}" class="value-display">0 GB Libre</div>
                                     </div>
                                     <div class="chart-container">
-                                        <canvas id="ramUsageChart"></canvas>
+                                        <canvas id="ramUsageChart-{{ s }}"></canvas>
                                     </div>
                                 </div>
                                 <div class="chart-item">
                                     <span class="card-title">Uso de CPU</span>
                                     <div class="value-display-row">
-                                        <div id="cpuUsage" class="value-display">0% Usado</div>
-                                        <div id="cpuFree" class="value-display">0% Libre</div>
+                                        <div id="cpuUsage-{{ s }}" class="value-display">0% Usado</div>
+                                        <div id="cpuFree-{{ s }}" class="value-display">0% Libre</div>
                                     </div>
                                     <div class="chart-container">
-                                        <canvas id="cpuUsageChart"></canvas>
+                                        <canvas id="cpuUsageChart-{{ s }}"></canvas>
                                     </div>
                                 </div>
                                 <div class="chart-item">
                                     <span class="card-title">Uso de Red</span>
                                     <div class="value-display-row">
-                                        <div id="networkSent" class="value-display">0 MB Enviado</div>
-                                        <div id="networkRecv" class="value-display">0 MB Recibido</div>
+                                        <div id="networkSent-{{ s }}" class="value-display">0 KB/s Enviado</div>
+                                        <div id="networkRecv-{{ s }}" class="value-display">0 KB/s Recibido</div>
                                     </div>
                                     <div class="chart-container">
-                                        <canvas id="networkUsageChart"></canvas>
+                                        <canvas id="networkUsageChart-{{ s }}"></canvas>
                                     </div>
                                 </div>
                             </div>
@@ -401,77 +631,484 @@ def index():
                                             <th>Estado</th>
                                         </tr>
                                     </thead>
-                                    <tbody id="processTableBody">
+                                    <tbody id="processTableBody-{{ s }}">
                                         <!-- Filas de procesos se llenarán aquí -->
                                     </tbody>
                                 </table>
                             </div>
                         </div>
                     </div>
+                    {% endif %}
                 </div>
                 {% endfor %}
             </div>
         </div>
     </body>
     </html>
-    ''', servers=server_info)
+    ''')
+
+# Página principal renderizada una sola vez por muestra (y por estado de los
+# agentes) y comprimida una vez por codificación: (clave, etag, {codificación: cuerpo})
+index_cache = (None, None, {})
+
+# Ruta para la página principal
+@app.route('/')
+def index():
+    global index_cache
+
+    snapshot = get_snapshot()
+    key = (snapshot['seq'], agent_sampler.seq if agent_sampler is not None else None)
+    cached, etag, variants = index_cache
+    if cached != key:
+        with stats.timer('render.index'):
+            server_info = [snapshot['server']] + agent_servers('info')
+            body = render_template(INDEX_TEMPLATE, servers=server_info, history_points=HISTORY_POINTS,
+                                   vendor=vendor).encode()
+        etag = hashlib.sha1(body).hexdigest()[:16]
+        variants = {None: body}
+        index_cache = (key, etag, variants)
+
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        encoding = negotiate(request.accept_encodings)
+        if encoding is not None and encoding not in variants:
+            variants[encoding] = compress(variants[None], encoding)
+        response = app.response_class(variants[encoding], mimetype='text/html')
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.no_cache = True
+    response.set_etag(etag)
+    return response
+
+# Chart.js, Materialize y Font Awesome empaquetados en static/vendor, para que
+# la página funcione sin acceso a las CDN. Con ?v=<versión> (la que pone la
+# plantilla) se pueden cachear para siempre.
+vendor = StaticBundle(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'vendor'),
+                      '/static/vendor')
+
+@app.route('/static/vendor/<path:name>')
+def vendor_asset(name):
+    if name not in vendor:
+        abort(404)
+    body, mimetype, etag, encoding = vendor.get(name, request.accept_encodings)
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype=mimetype)
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    if request.args.get('v') == etag:
+        response.cache_control.max_age = 365 * 86400
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.max_age = 86400
+    response.set_etag(etag)
+    return response
+
+# Identificador de este arranque: las secuencias de los muestreadores vuelven
+# a empezar en 1 en cada proceso, así que una ETag anterior a un reinicio no
+# debe coincidir con una nueva
+BOOT_ID = '%x' % time.time_ns()
+
+# Versión de los datos de /data: la muestra, la tabla de procesos y la ronda
+# de los agentes a partir de las que se construye el cuerpo
+def data_version(snapshot):
+    return (snapshot['seq'], process_sampler.latest()['seq'],
+            agent_sampler.seq if agent_sampler is not None else 0)
+
+def data_etag(version):
+    return '%s-%d-%d-%d' % ((BOOT_ID,) + version)
+
+# Respuesta de /data serializada una sola vez por versión: (versión, cuerpo JSON)
+data_cache = (None, None)
 
-# Ruta para los datos del servidor
+def get_data_body(snapshot):
+    global data_cache
+
+    version = data_version(snapshot)
+    cached, body = data_cache
+    if cached != version:
+        with stats.timer('serialize.data'):
+            body = app.json.dumps(build_data(snapshot))
+        data_cache = (version, body)
+    return body
+
+# Ruta para los datos del servidor.
+#   ?since=<cursor>     solo las muestras posteriores al cursor devuelto antes
+#   ?format=columnar    historial en arrays por métrica
+#   ?format=msgpack     igual que columnar, codificado con MessagePack
+# La ETag identifica el arranque y las secuencias de la muestra, de la tabla de
+# procesos y de los agentes: si nada ha cambiado se responde 304.
 @app.route('/data')
 def data():
-    global ram_history, cpu_history, network_history
-
-    server_info = [get_local_server_info()]
-    network_info = get_network_info()
-    top_processes = get_top_processes()
-
-    # Calcular el uso de RAM en GB
-    ram_used_gb = server_info[0]['memory'].used / (1024 ** 3)
-    ram_free_gb = server_info[0]['memory'].available / (1024 ** 3)
-    cpu_percent = server_info[0]['cpu_percent']
-    bytes_sent = network_info['bytes_sent']
-    bytes_recv = network_info['bytes_recv']
-
-    # Agregar datos actuales a la historia
-    ram_history.append(ram_used_gb)
-    cpu_history.append(cpu_percent)
-    network_history.append({"sent": bytes_sent, "recv": bytes_recv})
-
-    # Mantener solo los últimos 20 puntos de datos
-    if len(ram_history) > 20:
-        ram_history = ram_history[-20:]
-    if len(cpu_history) > 20:
-        cpu_history = cpu_history[-20:]
-    if len(network_history) > 20:
-        network_history = network_history[-20:]
-
-    labels = list(range(len(ram_history)))  # Etiquetas simples basadas en el número de puntos de datos
+    if 'range' in request.args:
+        return history_range()
+
+    fmt = request.args.get('format', 'json')
+    if fmt not in ('json', 'columnar', 'msgpack'):
+        abort(400)
+    if fmt == 'msgpack' and msgpack is None:
+        abort(406)
+    try:
+        since = int(request.args['since']) if 'since' in request.args else None
+    except ValueError:
+        abort(400)
+
+    snapshot = get_snapshot()
+    etag = data_etag(data_version(snapshot))
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    if since is None and fmt == 'json':
+        response = app.response_class(get_data_body(snapshot), mimetype='application/json')
+    else:
+        with stats.timer('serialize.data_' + fmt):
+            payload = build_data(snapshot, since=since or 0, columnar=fmt != 'json')
+            if fmt == 'msgpack':
+                body = msgpack.packb(payload)
+            else:
+                body = app.json.dumps(payload)
+        response = app.response_class(body, mimetype='application/msgpack' if fmt == 'msgpack' else 'application/json')
+    response.set_etag(etag)
+    return response
+
+# Historial de un rango arbitrario, p. ej. /data?range=6h&points=300.
+# Con &end=<timestamp> el rango termina en ese instante en lugar de ahora.
+# Con &device=net:<interfaz> o &device=disk:<disco> se consulta el historial
+# de ese dispositivo (solo resolución cruda).
+def history_range():
+    try:
+        seconds = parse_range(request.args['range'])
+        points = int(request.args.get('points', 300))
+        end = float(request.args['end']) if 'end' in request.args else None
+    except ValueError:
+        abort(400)
+    points = max(1, min(points, MAX_QUERY_POINTS))
+
+    source = rollups
+    if 'device' in request.args:
+        kind, _, name = request.args['device'].partition(':')
+        devices = {'net': interface_history, 'disk': disk_io_history}.get(kind)
+        store = devices.stores.get(name) if devices else None
+        if store is None:
+            abort(404)
+        source = RollupHistory(store, SAMPLE_INTERVAL, tiers=())
+
+    metrics = request.args.get('metrics')
+    metrics = metrics.split(',') if metrics else None
+    if metrics and not set(metrics) <= set(source.raw.metrics):
+        abort(400)
+    return jsonify(source.query(time.time(), seconds, points, metrics, end=end))
 
+# Recolectores con datos obsoletos, incluida la tabla de procesos si lleva
+# más de tres intervalos sin actualizarse
+def stale_collectors(sample):
+    stale = list(sample['stale'])
+    if time.time() - process_sampler.latest()['time'] > 3 * PROCESS_INTERVAL:
+        stale.append('processes')
+    return stale
+
+# Campos de la muestra que no forman parte del historial
+def server_fields(sample):
+    server = sample['server']
+    rates = sample['rates']
     # Preparar la información de los discos
     disk_usage = [{
         'used': usage.used / (1024 ** 3),
         'free': usage.free / (1024 ** 3),
         'total': usage.total / (1024 ** 3)
-    } for usage in server_info[0]['disk_usage'].values()]
-
-    servers_data = {
-        'labels': labels,
-        'ram': ram_history,
-        'ram_free': ram_free_gb,
-        'cpu': cpu_history,
-        'network': network_history,
+    } for usage in server['disk_usage'].values()]
+
+    return {
+        'name': server['name'],
+        'status': server['status'],
+        'ram_free': server['memory'].available / (1024 ** 3),  # RAM libre en GB
         'disk_usage': disk_usage,
-        'swap': server_info[0]['swap'],
-        'load_avg': server_info[0]['load_avg'],
-        'uptime': server_info[0]['uptime'],
-        'temperature': server_info[0]['temperature']
+        'swap': server['swap'],
+        'load_avg': server['load_avg'],
+        'uptime': server['uptime'],
+        'temperature': server['temperature'],
+        'interfaces': rates['interfaces'],
+        'disk_io': rates['disks'],
+        'disk_io_total': rates['disk_total'],
+        'stale': stale_collectors(sample)
+    }
+
+# Datos del servidor local: historial (desde `since`) y campos actuales
+def local_server_data(snapshot, since=0, columnar=False):
+    # Últimos puntos de datos del historial (solo los posteriores a `since`)
+    cursor, recent = history.after(since, HISTORY_POINTS)
+
+    if columnar:
+        servers_data = {'history': {name: values.tolist() for name, values in recent.items()}}
+    else:
+        ram_history = recent['ram'].tolist()
+        cpu_history = recent['cpu'].tolist()
+        # Velocidad de red en KB/s
+        network_history = [{"sent": sent / 1024, "recv": recv / 1024}
+                           for sent, recv in zip(recent['net_sent_rate'], recent['net_recv_rate'])]
+
+        labels = list(range(len(ram_history)))  # Etiquetas simples basadas en el número de puntos de datos
+
+        servers_data = {
+            'labels': labels,
+            'ram': ram_history,
+            'cpu': cpu_history,
+            'network': network_history
+        }
+    servers_data.update(server_fields(snapshot))
+    return cursor, servers_data
+
+# Los agentes siempre se incluyen completos y en formato normal
+def build_data(snapshot, since=0, columnar=False):
+    cursor, servers_data = local_server_data(snapshot, since, columnar)
+    payload = {
+        'cursor': cursor,
+        'servers': [servers_data] + agent_servers('data'),
+        'processes': get_top_processes()
+    }
+    if not columnar:
+        payload['labels'] = servers_data['labels']
+    return payload
+
+# Información del servidor en forma serializable, con las tuplas de psutil como diccionarios
+def server_info_json(server):
+    info = dict(server)
+    info['memory'] = server['memory']._asdict()
+    info['swap'] = server['swap']._asdict()
+    info['disk_usage'] = {device: usage._asdict() for device, usage in server['disk_usage'].items()}
+    return info
+
+# Respuesta de /agent/metrics serializada una vez por muestra
+agent_cache = (None, None)
+
+# Endpoint ligero del agente: la última muestra local, para el agregador
+@app.route('/agent/metrics')
+def agent_metrics():
+    global agent_cache
+
+    snapshot = get_snapshot()
+    seq, body = agent_cache
+    if seq != snapshot['seq']:
+        with stats.timer('serialize.agent'):
+            _, servers_data = local_server_data(snapshot)
+            servers_data['processes'] = get_top_processes()
+            body = app.json.dumps({
+                'seq': snapshot['seq'],
+                'time': snapshot['time'],
+                'info': server_info_json(snapshot['server']),
+                'data': servers_data
+            })
+        agent_cache = (snapshot['seq'], body)
+    return app.response_class(body, mimetype='application/json')
+
+# Difusión de muestras a los clientes de /stream: una recolección para todos
+broadcaster = Broadcaster()
+stream_state = {}  # Últimos valores publicados, para enviar solo lo que cambia
+
+@stats.timed('serialize.stream')
+def publish_sample(sample):
+    fields = server_fields(sample)
+    fields['processes'] = get_top_processes()
+    changed = {key: value for key, value in fields.items() if stream_state.get(key) != value}
+    stream_state.update(changed)
+
+    update = {
+        'seq': sample['seq'],
+        'ram': sample['server']['memory'].used / (1024 ** 3),
+        'cpu': sample['server']['cpu_percent'],
+        'network': {'sent': sample['rates']['network']['sent'] / 1024, 'recv': sample['rates']['network']['recv'] / 1024},
+        'changed': changed
     }
+    broadcaster.publish('sample', app.json.dumps(update), sample['seq'])
+
+sampler.subscribe(publish_sample)
+
+# Los agentes se envían enteros tras cada ronda del agregador
+def publish_hosts(result):
+    broadcaster.publish('hosts', app.json.dumps(agent_servers('data')))
+
+if agent_sampler is not None:
+    agent_sampler.subscribe(publish_hosts)
+
+# Cada cliente de /stream ocupa un hilo del servidor mientras está conectado:
+# por encima de este tope se responde 503 y la página pasa a sondear /data,
+# así los flujos nunca agotan los hilos que atienden al resto de peticiones.
+# Por defecto, la mitad de los hilos del worker de gunicorn.
+MAX_STREAMS = int(os.environ.get('MONITOR_MAX_STREAMS', str(max(1, int(os.environ.get('MONITOR_THREADS', '16')) // 2))))
+stream_slots = threading.BoundedSemaphore(MAX_STREAMS)
+
+# Flujo Server-Sent Events: una instantánea completa y después solo las muestras nuevas
+@app.route('/stream')
+def stream():
+    if not stream_slots.acquire(blocking=False):
+        abort(503, retry_after=30)
+    try:
+        response = stream_response()
+    except BaseException:
+        stream_slots.release()
+        raise
+    # El servidor cierra la respuesta al desconectarse el cliente, aunque el
+    # generador no haya llegado a empezar
+    response.call_on_close(stream_slots.release)
+    return response
+
+def stream_response():
+    # Los eventos publicados mientras se prepara la instantánea también se envían;
+    # el cliente descarta las muestras que ya estaban incluidas en ella
+    last_seq = broadcaster.seq
+    snapshot = get_snapshot()
+    initial = get_data_body(snapshot)
 
+    def generate():
+        yield sse_message('snapshot', initial, snapshot['seq'])
+        for event in broadcaster.listen(last_seq):
+            if event is None:
+                yield ': keepalive\n\n'
+            else:
+                _, kind, body, id = event
+                yield sse_message(kind, body, id)
+
+    return app.response_class(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+# Cuerpo de /metrics generado una vez por muestra: ((seq, seq de procesos, seq de cgroups), texto)
+metrics_cache = (None, None)
+
+# Exposición para Prometheus a partir de la última instantánea
+@app.route('/metrics')
+def metrics():
+    global metrics_cache
+
+    snapshot = get_snapshot()
+    processes = process_sampler.latest()
+    cgroups = cgroup_sampler.latest() if cgroup_sampler is not None else None
+    key = (snapshot['seq'], processes['seq'], cgroups['seq'] if cgroups else None)
+    cached_key, body = metrics_cache
+    if cached_key != key:
+        with stats.timer('render.metrics'):
+            body = render_metrics(snapshot, processes['processes'], cgroups['groups'] if cgroups else None)
+        metrics_cache = (key, body)
+    return app.response_class(body, content_type=CONTENT_TYPE)
+
+# Puntos pedidos en ?points=, entre 1 y MAX_QUERY_POINTS
+def query_points(default=300):
+    try:
+        points = int(request.args.get('points', default))
+    except ValueError:
+        abort(400)
+    return max(1, min(points, MAX_QUERY_POINTS))
+
+# Últimos puntos del uso por núcleo y del reparto por modo, por columnas
+@app.route('/api/cpu')
+def api_cpu():
+    get_snapshot()
+    points = query_points()
+    times, cores = core_history.last(points)
+    mode_times, modes = cpu_mode_history.last(points)
     return jsonify({
-        'labels': labels,
-        'servers': [servers_data],
-        'processes': top_processes
+        'time': times.round(3).tolist(),
+        'cores': column_lists(core_history.columns, cores, 1),
+        'modes_time': mode_times.round(3).tolist(),
+        'modes': column_lists(CPU_MODES, modes, 1)
     })
 
+# Historial corto de los procesos que han pasado por el top
+@app.route('/api/processes/history')
+def api_process_history():
+    get_top_processes()
+    return jsonify(process_history.histories())
+
+# Último valor e historial de cada cgroup
+@app.route('/api/cgroups')
+def api_cgroups():
+    if cgroup_sampler is None:
+        abort(404)
+    latest = cgroup_sampler.latest()
+    points = query_points(HISTORY_POINTS)
+    groups = {}
+    for group, current in latest['groups'].items():
+        store = cgroup_history.stores.get(group)
+        if store is None:
+            continue
+        times, values = store.last(points)
+        groups[group] = dict(current, history=dict(column_lists(CGROUP_COLUMNS, values), time=times.round(3).tolist()))
+    return jsonify({'root': cgroup_root, 'time': latest['time'], 'groups': groups})
+
+# Estadísticas de una métrica en un rango, p. ej. /api/stats?metric=cpu&range=7d.
+#   &end=<timestamp>     el rango termina en ese instante en lugar de ahora
+#   &tier=auto|raw|<s>   nivel consultado (auto: el más fino que cubre el rango)
+#   &percentiles=50,99   percentiles calculados
+#   &alpha=0.1           factor de la media móvil exponencial
+#   &z=3                 umbral del z-score para marcar anomalías
+@app.route('/api/stats')
+def api_stats():
+    metric = request.args.get('metric')
+    if metric not in history.metrics:
+        abort(400)
+    tier = request.args.get('tier', 'auto')
+    try:
+        seconds = parse_range(request.args.get('range', '1h'))
+        end = float(request.args['end']) if 'end' in request.args else None
+        if tier not in ('auto', 'raw'):
+            tier = int(tier)
+        percentiles = tuple(float(p) for p in request.args['percentiles'].split(',')) \
+            if 'percentiles' in request.args else DEFAULT_PERCENTILES
+        alpha = float(request.args.get('alpha', 0.1))
+        threshold = float(request.args.get('z', 3.0))
+    except ValueError:
+        abort(400)
+    if not all(0 <= p <= 100 for p in percentiles) or not 0 < alpha <= 1:
+        abort(400)
+    get_snapshot()
+    try:
+        with stats.timer('api.stats'):
+            result = history_stats.query(metric, seconds, end, tier, percentiles, alpha, threshold)
+    except ValueError:
+        abort(400)
+    return jsonify(result)
+
+# Alertas activas
+@app.route('/alerts')
+def alerts():
+    get_snapshot()
+    return jsonify(alert_engine.active())
+
+# Coste del propio monitor: duraciones de recolectores, serialización y plantilla
+@app.route('/debug/stats')
+def debug_stats():
+    return jsonify(stats.snapshot())
+
+# Perfilador por muestreo (solo con MONITOR_PROFILING=1). /debug/profile?seconds=10
+# devuelve las pilas en formato "collapsed" y las guarda en MONITOR_PROFILE_DIR.
+PROFILING = os.environ.get('MONITOR_PROFILING') == '1'
+PROFILE_DIR = os.environ.get('MONITOR_PROFILE_DIR', tempfile.gettempdir())
+
+@app.route('/debug/profile')
+def debug_profile():
+    if not PROFILING:
+        abort(404)
+    try:
+        seconds = min(float(request.args.get('seconds', 10)), 60.0)
+    except ValueError:
+        abort(400)
+    body = SamplingProfiler.collapsed(SamplingProfiler().run(seconds))
+    path = os.path.join(PROFILE_DIR, 'monitor-%d.collapsed' % time.time())
+    with open(path, 'w') as f:
+        f.write(body)
+    return app.response_class(body, mimetype='text/plain', headers={'X-Profile-Path': path})
+
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    # Con el recargador de Werkzeug este bloque también se ejecuta en el proceso
+    # que vigila los archivos: solo muestrea el proceso que sirve las peticiones
+    if is_running_from_reloader():
+        start_samplers()
+    app.run(debug=True, port=int(os.environ.get('MONITOR_PORT', '5000')))
@@ -0,0 +1,158 @@
+import heapq
+import threading
+import time
+
+import numpy as np
+import psutil
+
+from columnar import nullable_list
+
+
+# Tabla persistente de procesos: conserva los objetos Process entre ticks para
+# que cpu_percent mida la diferencia real desde la actualización anterior.
+class ProcessTable:
+    def __init__(self, top=10, history=None):
+        self.top = top
+        self.history = history  # ProcessHistory opcional de los procesos del top
+        self._procs = {}  # pid -> (Process, nombre, usuario)
+
+    def _track(self, pid, total_memory):
+        try:
+            proc = psutil.Process(pid)
+            with proc.oneshot():
+                proc.cpu_percent(None)  # Línea base para la próxima medición
+                memory = proc.memory_info().rss * 100.0 / total_memory
+                name = proc.name()
+                try:
+                    username = proc.username()
+                except (psutil.AccessDenied, KeyError):
+                    username = None
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+        self._procs[pid] = (proc, name, username)
+        return (0.0, memory, pid)
+
+    # Recorrer /proc una vez y devolver los `top` procesos con más CPU y memoria
+    def update(self):
+        pids = set(psutil.pids())
+        for pid in self._procs.keys() - pids:
+            del self._procs[pid]
+
+        total_memory = psutil.virtual_memory().total
+        entries = []
+        reused = []  # PIDs que ahora son de otro proceso
+        for pid, (proc, name, username) in list(self._procs.items()):
+            try:
+                with proc.oneshot():
+                    # is_running() compara la hora de creación: si el PID se ha
+                    # reutilizado, el nombre, el usuario y la línea base de CPU
+                    # guardados son de otro proceso
+                    if not proc.is_running():
+                        del self._procs[pid]
+                        reused.append(pid)
+                        continue
+                    cpu = proc.cpu_percent(None)
+                    memory = proc.memory_info().rss * 100.0 / total_memory
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                del self._procs[pid]
+                continue
+            except psutil.AccessDenied:
+                continue
+            entries.append((cpu, memory, pid))
+
+        # Los procesos nuevos entran con 0 % de CPU hasta el siguiente tick
+        for pid in pids - self._procs.keys():
+            entry = self._track(pid, total_memory)
+            if entry is not None:
+                entries.append(entry)
+
+        processes = []
+        for cpu, memory, pid in heapq.nlargest(self.top, entries):
+            proc, name, username = self._procs[pid]
+            try:
+                status = proc.status()
+            except psutil.Error:
+                continue
+            processes.append({
+                'pid': pid,
+                'name': name,
+                'username': username,
+                'cpu_percent': cpu,
+                'memory_percent': memory,
+                'status': status
+            })
+        now = time.time()
+        if self.history is not None:
+            self.history.update(now, entries, processes, reused)
+        return {'time': now, 'processes': processes}
+
+
+# Historial corto de los procesos que entran en el top. Cada métrica es una
+# matriz NumPy (huecos x puntos) con un eje de tiempo común: cada tick escribe
+# una columna para todos los procesos seguidos (NaN si no hay dato). Un
+# proceso deja de seguirse `points` ticks después de salir del top.
+class ProcessHistory:
+    def __init__(self, points=60, slots=64):
+        self.points = points
+        self.slots = slots
+        self.count = 0  # Ticks escritos desde el arranque
+        self._times = np.zeros(points, np.float64)
+        self._cpu = np.full((slots, points), np.nan, np.float32)
+        self._memory = np.full((slots, points), np.nan, np.float32)
+        self._tracked = {}  # pid -> [hueco, nombre, último tick en el top]
+        self._free = list(range(slots - 1, -1, -1))
+        self._lock = threading.Lock()
+
+    def _slot(self, pid, name):
+        if not self._free:
+            # Sin huecos: liberar el proceso que lleva más tiempo fuera del top
+            oldest = min(self._tracked, key=lambda tracked: self._tracked[tracked][2])
+            self._free.append(self._tracked.pop(oldest)[0])
+        slot = self._free.pop()
+        self._cpu[slot] = np.nan
+        self._memory[slot] = np.nan
+        self._tracked[pid] = [slot, name, self.count]
+        return slot
+
+    # `entries`: (cpu, memoria, pid) de todos los procesos; `top`: los del top;
+    # `reused`: PIDs reasignados a otro proceso, cuyo historial se descarta
+    def update(self, timestamp, entries, top, reused=()):
+        with self._lock:
+            for pid in reused:
+                if pid in self._tracked:
+                    self._free.append(self._tracked.pop(pid)[0])
+            column = self.count % self.points
+            self._times[column] = timestamp
+            self._cpu[:, column] = np.nan
+            self._memory[:, column] = np.nan
+            for proc in top:
+                tracked = self._tracked.get(proc['pid'])
+                if tracked is None:
+                    self._slot(proc['pid'], proc['name'])
+                else:
+                    tracked[2] = self.count
+            tracked = self._tracked
+            for cpu, memory, pid in entries:
+                entry = tracked.get(pid)
+                if entry is not None:
+                    self._cpu[entry[0], column] = cpu
+                    self._memory[entry[0], column] = memory
+            for pid in [pid for pid, entry in tracked.items() if entry[2] <= self.count - self.points]:
+                self._free.append(tracked.pop(pid)[0])
+            self.count += 1
+
+    # {pid: {'name', 'time', 'cpu_percent', 'memory_percent'}} en orden cronológico
+    def histories(self):
+        with self._lock:
+            n = min(self.count, self.points)
+            order = (np.arange(n) + self.count - n) % self.points
+            times = self._times[order].round(3).tolist()
+            result = {}
+            for pid, (slot, name, _) in self._tracked.items():
+                result[pid] = {
+                    'name': name,
+                    'time': times,
+                    'cpu_percent': nullable_list(self._cpu[slot, order]),
+                    'memory_percent': nullable_list(self._memory[slot, order])
+                }
+            return result
@@ -0,0 +1,86 @@
+# Límite de los contadores de 32 bits de algunas plataformas
+COUNTER_32 = 2 ** 32
+
+
+# Velocidades por segundo a partir de contadores acumulados. Guarda la lectura
+# anterior de cada clave (interfaz, disco...) y calcula la diferencia. `wrap32`
+# solo para fuentes que pueden dar la vuelta en 32 bits (contadores de red y
+# disco de psutil en algunas plataformas); los contadores de 64 bits, como los
+# de cpu.stat, nunca dan la vuelta y una bajada es siempre un reinicio.
+class CounterRates:
+    def __init__(self, wrap32=False):
+        self.wrap32 = wrap32
+        self._last = {}  # clave -> (marca de tiempo, contadores)
+
+    # Diferencia entre dos lecturas de un contador. Si baja, o bien ha dado la
+    # vuelta en 32 bits (con `wrap32`), o bien se ha reiniciado (interfaz o
+    # cgroup recreados, reinicio del driver) y se cuenta desde cero como hace
+    # Prometheus.
+    def delta(self, previous, current):
+        if current >= previous:
+            return current - previous
+        if self.wrap32 and previous < COUNTER_32:
+            wrapped = current + COUNTER_32 - previous
+            if wrapped < COUNTER_32 // 2:
+                return wrapped
+        return current
+
+    # Velocidad de cada contador de `counters` desde la lectura anterior de
+    # `key`; la primera vez todo vale 0.
+    def update(self, key, timestamp, counters):
+        previous = self._last.get(key)
+        self._last[key] = (timestamp, counters)
+        if previous is None or timestamp <= previous[0]:
+            return dict.fromkeys(counters, 0.0)
+        elapsed = timestamp - previous[0]
+        last = previous[1]
+        return {name: self.delta(last.get(name, value), value) / elapsed for name, value in counters.items()}
+
+    # Olvidar las claves que ya no aparecen (interfaces o discos retirados)
+    def retain(self, keys):
+        for key in self._last.keys() - set(keys):
+            del self._last[key]
+
+
+# Campos de psutil.cpu_times que ya están incluidos en user y nice (Linux)
+GUEST_TIMES = ('guest', 'guest_nice')
+
+
+def _cpu_total(deltas):
+    return sum(value for name, value in deltas.items() if name not in GUEST_TIMES)
+
+
+def _cpu_busy(deltas):
+    total = _cpu_total(deltas)
+    if total <= 0:
+        return 0.0
+    idle = deltas.get('idle', 0.0) + deltas.get('iowait', 0.0)
+    return round(max(0.0, total - idle) * 100 / total, 1)
+
+
+# Porcentajes de uso de CPU (total, por núcleo y por modo) a partir de los
+# tiempos acumulados de psutil.cpu_times(percpu=True). La lectura anterior se
+# guarda aquí y no en psutil, que la guarda por hilo: así el resultado no
+# depende de qué hilo del pool ejecute el recolector.
+class CpuUsage:
+    def __init__(self):
+        self._last = None
+
+    # Devuelve (porcentaje total, porcentajes por núcleo, {modo: porcentaje})
+    def update(self, per_cpu_times):
+        current = [times._asdict() for times in per_cpu_times]
+        last, self._last = self._last, current
+        if last is None or len(last) != len(current):
+            return 0.0, [0.0] * len(current), {}
+
+        totals = {}
+        per_core = []
+        for previous, times in zip(last, current):
+            deltas = {name: max(0.0, value - previous.get(name, value)) for name, value in times.items()}
+            for name, value in deltas.items():
+                totals[name] = totals.get(name, 0.0) + value
+            per_core.append(_cpu_busy(deltas))
+        total = _cpu_total(totals)
+        modes = {name: round(value * 100 / total, 1) for name, value in totals.items()
+                 if name not in GUEST_TIMES} if total > 0 else {}
+        return _cpu_busy(totals), per_core, modes
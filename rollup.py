@@ -0,0 +1,172 @@
+import re
+import threading
+
+import numpy as np
+
+from timeseries import TimeSeriesStore
+
+# Niveles de agregación por defecto: (resolución en segundos, retención en segundos)
+DEFAULT_TIERS = (
+    (10, 2 * 86400),
+    (60, 14 * 86400),
+    (600, 90 * 86400),
+)
+
+RANGE_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+
+# Cubos que una consulta puede leer del nivel elegido: como mucho este
+# múltiplo de los puntos pedidos, para que el coste no crezca con el rango.
+# No es menor que el salto entre niveles consecutivos (10 s -> 1 min -> 10 min),
+# así que el nivel elegido aún tiene al menos `points` cubos.
+OVERSAMPLE = 10
+
+
+# Convertir un rango como "90s", "30m", "6h" o "7d" a segundos
+def parse_range(text):
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([smhdw]?)', text.strip())
+    if not match or float(match.group(1)) <= 0:
+        raise ValueError('Rango inválido: %r' % text)
+    return float(match.group(1)) * RANGE_UNITS[match.group(2) or 's']
+
+
+# Un nivel de agregación: guarda min/max/avg por cubo de `resolution` segundos.
+# El cubo abierto se acumula muestra a muestra y se vuelca al cerrarse.
+class RollupTier:
+    def __init__(self, metrics, resolution, retention):
+        self.metrics = tuple(metrics)
+        self.resolution = resolution
+        self.retention = retention
+        self.store = TimeSeriesStore(
+            ['%s_%s' % (name, stat) for name in self.metrics for stat in ('min', 'max', 'avg')],
+            capacity=int(retention // resolution)
+        )
+        self.archive = None  # Almacén en disco opcional que recibe cada cubo cerrado
+        self._bucket = None
+        self._count = 0
+        self._min = {}
+        self._max = {}
+        self._sum = {}
+        self._lock = threading.Lock()  # El cubo abierto también se lee desde las consultas
+
+    def add(self, timestamp, values):
+        bucket = int(timestamp // self.resolution)
+        with self._lock:
+            if bucket != self._bucket:
+                self._flush()
+                self._bucket = bucket
+                self._count = 0
+                self._min = dict(values)
+                self._max = dict(values)
+                self._sum = dict.fromkeys(values, 0.0)
+            for name, value in values.items():
+                if value < self._min[name]:
+                    self._min[name] = value
+                if value > self._max[name]:
+                    self._max[name] = value
+                self._sum[name] += value
+            self._count += 1
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._count:
+            return
+        row = self._row()
+        self.store.append(self._bucket * self.resolution, row)
+        if self.archive is not None:
+            self.archive.append(self._bucket * self.resolution, row)
+        self._count = 0
+
+    def _row(self):
+        row = {}
+        for name in self.metrics:
+            row[name + '_min'] = self._min.get(name, 0.0)
+            row[name + '_max'] = self._max.get(name, 0.0)
+            row[name + '_avg'] = self._sum.get(name, 0.0) / self._count
+        return row
+
+    # Cubo abierto con lo acumulado hasta ahora: (marca de tiempo, fila), o None
+    def partial(self):
+        with self._lock:
+            if not self._count:
+                return None
+            return self._bucket * self.resolution, self._row()
+
+
+# Historial multirresolución: el nivel crudo más los niveles agregados
+class RollupHistory:
+    def __init__(self, raw, resolution, tiers=DEFAULT_TIERS):
+        self.raw = raw
+        self.resolution = resolution
+        self.archive = None  # Muestras crudas en disco, con más retención que la memoria
+        self.tiers = [RollupTier(raw.metrics, res, retention) for res, retention in tiers]
+
+    # Alimentar los niveles agregados con una muestra cruda (coste constante)
+    def add(self, timestamp, values):
+        for tier in self.tiers:
+            tier.add(timestamp, values)
+
+    # Elegir el nivel más fino que cubra `age` segundos hacia atrás y que
+    # tenga como mucho OVERSAMPLE * `points` cubos en `seconds` segundos (si
+    # ninguno cumple, el más grueso de los que cubren; si ninguno cubre, el
+    # más grueso). La consulta reagrupa después hasta `points` puntos.
+    def pick(self, seconds, points, age=None):
+        age = seconds if age is None else age
+        raw_retention = self.archive.retention if self.archive else self.raw.capacity * self.resolution
+        candidates = [(self.resolution, raw_retention, None)]
+        candidates += [(t.resolution, t.retention, t) for t in self.tiers]
+        covering = [c for c in candidates if age <= c[1]] or candidates[-1:]
+        for resolution, _, tier in covering:
+            if seconds / resolution <= OVERSAMPLE * points:
+                return resolution, tier
+        resolution, _, tier = covering[-1]
+        return resolution, tier
+
+    # Consultar los `seconds` segundos anteriores a `end` (por defecto, ahora)
+    # devolviendo como mucho `points` puntos
+    def query(self, now, seconds, points, metrics=None, end=None):
+        metrics = tuple(metrics or self.raw.metrics)
+        end = now if end is None else end
+        start = end - seconds
+        resolution, tier = self.pick(seconds, points, now - start)
+        if tier is None:
+            oldest = self.raw.oldest()
+            if self.archive is not None and (oldest is None or start < oldest):
+                rows = self.archive.read(start, end, metrics)
+            else:
+                rows = self.raw.between(start, end, metrics)
+            series = {name: {'min': rows[name], 'max': rows[name], 'avg': rows[name]} for name in metrics}
+        else:
+            names = ['%s_%s' % (name, stat) for name in metrics for stat in ('min', 'max', 'avg')]
+            rows = tier.store.between(start, end, names)
+            # El cubo abierto aún no está en el almacén: se añade con sus valores parciales
+            partial = tier.partial()
+            if partial is not None and start <= partial[0] < end and (not rows['time'] or partial[0] > rows['time'][-1]):
+                rows['time'].append(partial[0])
+                for name in names:
+                    rows[name].append(partial[1][name])
+            series = {name: {stat: rows['%s_%s' % (name, stat)] for stat in ('min', 'max', 'avg')}
+                      for name in metrics}
+        times = rows['time']
+
+        # Reagrupar los cubos en `points` grupos contiguos de tamaño casi igual
+        count = len(times)
+        if points and count > points:
+            starts = np.arange(points) * count // points
+            sizes = np.diff(np.append(starts, count))
+            resolution = resolution * count / points
+            times = np.frombuffer(times, np.float64)[starts]
+            for name in metrics:
+                s = series[name]
+                s['min'] = np.minimum.reduceat(np.frombuffer(s['min'], np.float64), starts)
+                s['max'] = np.maximum.reduceat(np.frombuffer(s['max'], np.float64), starts)
+                s['avg'] = np.add.reduceat(np.frombuffer(s['avg'], np.float64), starts) / sizes
+
+        return {
+            'resolution': resolution,
+            'labels': times.tolist(),
+            'series': {name: {stat: values.tolist() for stat, values in s.items()} for name, s in series.items()}
+        }
+
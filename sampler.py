@@ -0,0 +1,68 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# Motor de muestreo en segundo plano: ejecuta la función de recolección
+# cada `interval` segundos y guarda la última instantánea para que las
+# rutas HTTP la lean sin bloquearse en psutil.
+class Sampler:
+    def __init__(self, collect, interval=1.0):
+        self.collect = collect
+        self.interval = interval
+        self.seq = 0
+        self._latest = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # Registrar una función que recibe cada muestra nueva (historia, alertas...)
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def latest(self):
+        if self._thread is None:
+            self.start()
+        return self._latest
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            # Primera muestra síncrona para que nunca se sirva una instantánea vacía
+            self._tick()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='sampler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def _tick(self):
+        sample = self.collect()
+        self.seq += 1
+        sample['seq'] = self.seq
+        # Sustitución atómica de la referencia: los lectores nunca ven una muestra a medias
+        self._latest = sample
+        for listener in self._listeners:
+            listener(sample)
+
+    def _run(self):
+        # Reloj fijo: el siguiente tick se calcula desde el anterior, no desde el final de la recolección
+        next_tick = time.monotonic() + self.interval
+        while not self._stop.wait(max(0.0, next_tick - time.monotonic())):
+            try:
+                self._tick()
+            except Exception:
+                # Un fallo puntual de psutil no debe matar el hilo de muestreo
+                logger.exception('Error al recolectar la muestra')
+            next_tick += self.interval
+            now = time.monotonic()
+            if next_tick < now:
+                next_tick = now + self.interval
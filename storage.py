@@ -0,0 +1,194 @@
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin cerrojo, un único proceso escritor
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Cabecera de cada segmento: firma, número de columnas y reservado
+MAGIC = b'MPCSEG1\0'
+HEADER = struct.Struct('<8sII')
+
+# Filas por segmento: cada segmento cubre SEGMENT_ROWS * resolución segundos
+SEGMENT_ROWS = 3600
+
+
+# Almacén en disco de filas de ancho fijo (marca de tiempo + una columna por
+# métrica, todas en double) repartidas en segmentos de solo-añadir que rotan
+# por tiempo. Las lecturas de rango se hacen sobre mmap, sin parsear.
+class SegmentStore:
+    def __init__(self, directory, columns, resolution, retention):
+        self.directory = directory
+        self.columns = tuple(columns)
+        self.segment_seconds = SEGMENT_ROWS * resolution
+        self.retention = retention
+        self.width = 1 + len(self.columns)
+        self.record = struct.Struct('<%dd' % self.width)
+        self._file = None
+        self._segment = None  # Inicio del segmento abierto para escritura
+        self._lock = threading.Lock()
+        self._owner = None  # (pid, archivo) del cerrojo de escritor
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, segment):
+        return os.path.join(self.directory, '%d.seg' % segment)
+
+    def segments(self):
+        starts = []
+        for name in os.listdir(self.directory):
+            stem, ext = os.path.splitext(name)
+            if ext == '.seg' and stem.isdigit():
+                starts.append(int(stem))
+        return sorted(starts)
+
+    # Abrir (o crear) el segmento que corresponde a `timestamp` para añadir filas
+    def _open(self, timestamp):
+        segment = int(timestamp // self.segment_seconds) * self.segment_seconds
+        path = self._path(segment)
+        if os.path.exists(path):
+            f = open(path, 'r+b')
+            magic, ncols, _ = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or ncols != len(self.columns):
+                f.close()
+                os.replace(path, path + '.invalid')
+                return self._open(timestamp)
+            # Descartar una fila incompleta que haya quedado de una caída
+            rows = (os.fstat(f.fileno()).st_size - HEADER.size) // self.record.size
+            f.truncate(HEADER.size + rows * self.record.size)
+            f.seek(0, os.SEEK_END)
+        else:
+            f = open(path, 'wb')
+            f.write(HEADER.pack(MAGIC, len(self.columns), 0))
+        self._file = f
+        self._segment = segment
+        self._expire(timestamp)
+
+    # Borrar los segmentos que quedan fuera de la retención
+    def _expire(self, now):
+        for segment in self.segments():
+            if segment + self.segment_seconds < now - self.retention:
+                try:
+                    os.remove(self._path(segment))
+                except OSError:
+                    logger.exception('No se pudo borrar el segmento %d', segment)
+
+    # Con un servidor de varios procesos solo escribe el que consigue el
+    # cerrojo del directorio; los demás lo reintentan en cada fila.
+    def _writer(self):
+        if fcntl is None:
+            return True
+        if self._owner is not None and self._owner[0] == os.getpid():
+            return True
+        f = open(os.path.join(self.directory, 'lock'), 'a')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        # Tras un fork el segmento abierto es del proceso padre
+        self.close()
+        self._owner = (os.getpid(), f)
+        return True
+
+    def append(self, timestamp, values):
+        with self._lock:
+            if not self._writer():
+                return
+            if self._segment is None or timestamp >= self._segment + self.segment_seconds:
+                self.close()
+                self._open(timestamp)
+            self._file.write(self.record.pack(timestamp, *(values.get(name, 0.0) for name in self.columns)))
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._segment = None
+
+    # Columnas del segmento `segment` con marca de tiempo en [start, end).
+    # Las columnas se recortan como vistas con paso sobre el mmap y solo se
+    # copian los bytes del rango pedido.
+    def _read_segment(self, segment, start, end, indexes, result):
+        try:
+            f = open(self._path(segment), 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            # Los segmentos escritos con otro esquema de columnas se ignoran
+            magic, ncols, _ = HEADER.unpack(f.read(HEADER.size).ljust(HEADER.size, b'\0'))
+            if magic != MAGIC or ncols != len(self.columns):
+                return
+            rows = (os.fstat(f.fileno()).st_size - HEADER.size) // self.record.size
+            if rows <= 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as raw:
+                    with raw[HEADER.size:HEADER.size + rows * self.record.size].cast('d') as view:
+                        lo = _bisect(view, self.width, rows, start)
+                        hi = _bisect(view, self.width, rows, end)
+                        if lo < hi:
+                            for key, index in indexes:
+                                with view[lo * self.width + index:hi * self.width:self.width] as column:
+                                    result[key].frombytes(column.tobytes())
+
+    def read(self, start, end, columns=None):
+        columns = tuple(columns or self.columns)
+        indexes = [('time', 0)] + [(name, 1 + self.columns.index(name)) for name in columns]
+        result = {key: array('d') for key, _ in indexes}
+        for segment in self.segments():
+            if segment < end and segment + self.segment_seconds > start:
+                self._read_segment(segment, start, end, indexes, result)
+        return result
+
+    # Las últimas `seconds` segundos de filas, para recuperar el historial al arrancar
+    def tail(self, seconds, now=None):
+        now = time.time() if now is None else now
+        return self.read(now - seconds, float('inf'))
+
+
+# Primera fila con marca de tiempo >= `timestamp`
+def _bisect(view, width, rows, timestamp):
+    lo, hi = 0, rows
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if view[mid * width] < timestamp:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+# Persistencia del historial crudo y de los niveles agregados. Al arrancar
+# recupera de disco lo que cabe en memoria y a partir de ahí escribe cada
+# muestra y cada cubo cerrado.
+class MetricsArchive:
+    def __init__(self, directory, history, rollups, retention):
+        self.history = history
+        self.rollups = rollups
+        self.raw = SegmentStore(os.path.join(directory, 'raw'), history.metrics, rollups.resolution, retention)
+        self.tiers = [SegmentStore(os.path.join(directory, 'tier-%d' % tier.resolution), tier.store.metrics,
+                                   tier.resolution, tier.retention) for tier in rollups.tiers]
+
+    # Cargar en memoria el final de cada almacén y engancharlos al historial
+    def restore(self):
+        started = time.perf_counter()
+        rows = self.raw.tail(self.history.capacity * self.rollups.resolution)
+        self.history.extend(rows.pop('time'), rows)
+        for tier, store in zip(self.rollups.tiers, self.tiers):
+            rows = store.tail(tier.retention)
+            tier.store.extend(rows.pop('time'), rows)
+            tier.archive = store
+        self.rollups.archive = self.raw
+        logger.info('Historial recuperado en %.1f ms', (time.perf_counter() - started) * 1000)
+
+    def append(self, timestamp, values):
+        self.raw.append(timestamp, values)
@@ -0,0 +1,44 @@
+import threading
+from collections import deque
+
+
+# Reparto de eventos a todos los clientes suscritos. Cada evento se serializa
+# una sola vez; los clientes esperan en una condición compartida y leen de un
+# pequeño historial, así un cliente lento no frena al productor ni a los demás.
+class Broadcaster:
+    def __init__(self, backlog=64, keepalive=15.0):
+        self.keepalive = keepalive
+        self.seq = 0  # Secuencia interna del último evento publicado
+        self._events = deque(maxlen=backlog)  # (seq, tipo, cuerpo, id)
+        self._cond = threading.Condition()
+
+    def publish(self, event, body, id=None):
+        with self._cond:
+            self.seq += 1
+            self._events.append((self.seq, event, body, id))
+            self._cond.notify_all()
+
+    # Generador de eventos (seq, tipo, cuerpo, id) posteriores a `last_seq`.
+    # Produce None cuando pasa `keepalive` segundos sin eventos.
+    def listen(self, last_seq):
+        while True:
+            with self._cond:
+                pending = [event for event in self._events if event[0] > last_seq]
+                if not pending:
+                    self._cond.wait(self.keepalive)
+                    pending = [event for event in self._events if event[0] > last_seq]
+            if not pending:
+                yield None
+                continue
+            yield from pending
+            last_seq = pending[-1][0]
+
+
+# Formatear un mensaje Server-Sent Events
+def sse_message(event, body, id=None):
+    lines = []
+    if id is not None:
+        lines.append('id: %s' % id)
+    lines.append('event: %s' % event)
+    lines.extend('data: ' + line for line in body.splitlines())
+    return '\n'.join(lines) + '\n\n'
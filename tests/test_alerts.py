@@ -0,0 +1,78 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from alerts import AlertEngine, Rule, SlidingWindow
+
+
+def brute_force(samples, now, seconds):
+    return [(t, v) for t, v in samples if t >= now - seconds]
+
+
+def test_sliding_window_matches_brute_force_across_rebases():
+    rng = random.Random(7)
+    window = SlidingWindow(30)
+    samples = []
+    t = 1.7e9
+    for _ in range(500):
+        t += rng.choice((0.5, 1.0, 3.0))
+        value = rng.uniform(-50, 50)
+        samples.append((t, value))
+        window.add(t, value)
+        inside = brute_force(samples, t, 30)
+        values = [v for _, v in inside]
+        assert len(window) == len(inside)
+        assert window.min() == min(values)
+        assert window.max() == max(values)
+        assert window.avg() == pytest.approx(sum(values) / len(values))
+    # Pendiente de mínimos cuadrados calculada directamente
+    n = len(inside)
+    mt = sum(t for t, _ in inside) / n
+    mv = sum(v for _, v in inside) / n
+    slope = sum((t - mt) * (v - mv) for t, v in inside) / sum((t - mt) ** 2 for t, _ in inside)
+    assert window.slope() == pytest.approx(slope, rel=1e-6)
+
+
+def test_slope_of_a_line_survives_rebase():
+    window = SlidingWindow(10)
+    for i in range(100):
+        window.add(1.7e9 + i, 3.0 * i + 1)
+    assert window.slope() == pytest.approx(3.0)
+
+
+def sample(t, cpu, disks=None):
+    usage = {device: SimpleNamespace(used=used, total=100, percent=used) for device, used in (disks or {}).items()}
+    return {
+        'time': t,
+        'server': {
+            'cpu_percent': cpu,
+            'memory': SimpleNamespace(percent=0, used=0),
+            'swap': SimpleNamespace(percent=0, used=0),
+            'load_avg': (0, 0, 0),
+            'disk_usage': usage,
+            'temperature': 'N/A'
+        },
+        'rates': {'network': {'sent': 0, 'recv': 0}}
+    }
+
+
+def test_threshold_fires_once_and_resolves_with_hysteresis():
+    events = []
+    rule = Rule('cpu', 'threshold', 'cpu_percent', '>', 90, clear=80, window=2, aggregate='min')
+    engine = AlertEngine([rule], [events.append])
+    for t, cpu in enumerate([95, 95, 95, 95, 85, 85, 85, 70, 70, 70]):
+        engine.evaluate(sample(float(t), cpu))
+    assert [(e['status'], e['time']) for e in events] == [('firing', 2.0), ('resolved', 7.0)]
+    assert engine.active() == []
+
+
+def test_alert_of_a_removed_device_is_resolved():
+    events = []
+    rule = Rule('disk', 'threshold', 'disk_percent', '>', 90)
+    engine = AlertEngine([rule], [events.append])
+    engine.evaluate(sample(0.0, 0, {'/dev/sdb': 95}))
+    assert [e['device'] for e in engine.active()] == ['/dev/sdb']
+    engine.evaluate(sample(1.0, 0, {}))
+    assert [e['status'] for e in events] == ['firing', 'resolved']
+    assert engine.active() == []
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from analytics import MAX_ANOMALIES, ewma, summarize
+
+
+def reference_ewma(values, alpha):
+    result = []
+    previous = values[0]
+    for value in values:
+        previous = alpha * value + (1 - alpha) * previous
+        result.append(previous)
+    return result
+
+
+@pytest.mark.parametrize('alpha', [0.001, 0.1, 0.5, 0.99, 1.0])
+def test_ewma_matches_the_recurrence_across_blocks(alpha):
+    values = np.random.default_rng(3).normal(50, 20, 5000)
+    assert ewma(values, alpha) == pytest.approx(reference_ewma(values, alpha), rel=1e-9, abs=1e-9)
+
+
+def test_ewma_of_empty_series():
+    assert len(ewma([], 0.1)) == 0
+
+
+def test_summarize_percentiles_and_anomalies():
+    values = np.zeros(1000)
+    values[500] = 100.0
+    result = summarize(np.arange(1000.0), values, percentiles=(50, 99.5))
+    assert result['count'] == 1000
+    assert result['percentiles'] == {'50': 0.0, '99.5': 0.0}
+    assert result['anomaly_count'] == 1
+    assert result['anomalies'][0]['time'] == 500.0
+
+
+def test_summarize_caps_listed_anomalies_but_counts_all():
+    values = np.zeros(10000)
+    values[::50] = np.arange(200) + 100.0
+    result = summarize(np.arange(10000.0), values)
+    assert result['anomaly_count'] == 200
+    assert len(result['anomalies']) == MAX_ANOMALIES
+    # Se listan las más extremas, en orden cronológico
+    times = [a['time'] for a in result['anomalies']]
+    assert times == sorted(times)
+    assert min(a['value'] for a in result['anomalies']) == 200.0
+
+
+def test_summarize_constant_series_has_no_anomalies():
+    result = summarize([1.0, 2.0, 3.0], [5.0, 5.0, 5.0])
+    assert result['std'] == 0
+    assert result['anomaly_count'] == 0
@@ -0,0 +1,29 @@
+import threading
+import time
+
+from cache import TTLCache
+
+
+def test_stale_value_served_while_refreshing():
+    cache = TTLCache()
+    assert cache.get('key', lambda: 1, 0.01) == 1
+    time.sleep(0.02)
+    # Caducada: se sirve el valor anterior y el nuevo llega en segundo plano
+    assert cache.get('key', lambda: 2, 10) == 1
+    time.sleep(0.05)
+    assert cache.get('key', lambda: 3, 10) == 2
+
+
+def test_hung_refreshes_are_reported_overdue():
+    cache = TTLCache(workers=1)
+    release = threading.Event()
+    # Un único hilo: el primer montaje colgado deja al segundo en cola
+    assert cache.get('/mnt/a', release.wait, 10, default=None) is None
+    assert cache.get('/mnt/b', lambda: 'b', 10, default=None) is None
+    assert cache.overdue(1.0) == []
+    time.sleep(0.05)
+    assert sorted(cache.overdue(0.01)) == ['/mnt/a', '/mnt/b']
+    release.set()
+    time.sleep(0.05)
+    assert cache.overdue(0.01) == []
+    assert cache.get('/mnt/b', lambda: 'b', 10, default=None) == 'b'
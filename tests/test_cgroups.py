@@ -0,0 +1,23 @@
+from types import SimpleNamespace
+
+import cgroups
+from cgroups import CgroupReader
+
+
+def write_stat(path, usage):
+    path.joinpath('cpu.stat').write_text(
+        'usage_usec %d\nuser_usec %d\nsystem_usec 0\nthrottled_usec 0\n' % (usage, usage))
+
+
+def test_recreated_cgroup_is_a_reset_not_a_wrap(tmp_path, monkeypatch):
+    clock = iter([100.0, 101.0, 102.0])
+    monkeypatch.setattr(cgroups, 'time', SimpleNamespace(time=lambda: next(clock)))
+    reader = CgroupReader(str(tmp_path), depth=0)
+
+    write_stat(tmp_path, 3 * 10 ** 9)
+    reader.update()
+    write_stat(tmp_path, 3 * 10 ** 9 + 2 * 10 ** 6)
+    assert reader.update()['groups']['/']['cpu_cores'] == 2.0
+    # Contador reiniciado: cuenta desde cero en lugar de leerse como 259 núcleos
+    write_stat(tmp_path, 10 ** 6)
+    assert reader.update()['groups']['/']['cpu_cores'] == 1.0
@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+import collectors
+from cache import TTLCache
+from rates import CounterRates
+
+
+@pytest.fixture
+def rates(monkeypatch):
+    monkeypatch.setattr(collectors, 'counter_rates', CounterRates(wrap32=True))
+    monkeypatch.setattr(collectors, 'is_whole_disk', lambda disk: not disk[-1].isdigit())
+    return collectors.get_rates
+
+
+def nic(sent, recv):
+    return {'bytes_sent': sent, 'bytes_recv': recv, 'packets_sent': 0, 'packets_recv': 0}
+
+
+def disk(read, written):
+    return {'read_bytes': read, 'write_bytes': written, 'read_count': 0, 'write_count': 0}
+
+
+def network(**interfaces):
+    # Los agregados de psutil son la suma de las interfaces presentes
+    return {
+        'bytes_sent': sum(counters['bytes_sent'] for counters in interfaces.values()) / 1024 ** 2,
+        'bytes_recv': sum(counters['bytes_recv'] for counters in interfaces.values()) / 1024 ** 2,
+        'interfaces': interfaces
+    }
+
+
+def test_network_total_survives_an_interface_disappearing(rates):
+    rates(0.0, network(eth0=nic(1000, 2000), veth1=nic(10 ** 9, 10 ** 9)), {})
+    # veth1 desaparece: el agregado baja 1 GB, pero eth0 sigue creciendo
+    result = rates(1.0, network(eth0=nic(1500, 2100)), {})
+    assert result['network'] == {'sent': 500.0, 'recv': 100.0}
+    assert list(result['interfaces']) == ['eth0']
+
+
+def test_disk_total_skips_partitions(rates):
+    rates(0.0, network(), {'sda': disk(0, 0), 'sda1': disk(0, 0), 'sdb': disk(0, 0)})
+    result = rates(1.0, network(), {'sda': disk(4096, 512), 'sda1': disk(4096, 512), 'sdb': disk(1024, 0)})
+    assert result['disk_total'] == {'read_rate': 5120.0, 'write_rate': 512.0, 'read_iops': 0.0, 'write_iops': 0.0}
+    assert set(result['disks']) == {'sda', 'sda1', 'sdb'}
+
+
+def test_disk_total_survives_a_disk_disappearing(rates):
+    rates(0.0, network(), {'sda': disk(1000, 0), 'sdb': disk(10 ** 9, 0)})
+    result = rates(1.0, network(), {'sda': disk(3000, 0)})
+    assert result['disk_total']['read_rate'] == 2000.0
+
+
+def test_hung_disk_usage_marks_disks_stale(monkeypatch):
+    cache = TTLCache(workers=1)
+    monkeypatch.setattr(collectors, 'disk_usage_cache', cache)
+    monkeypatch.setattr(collectors, 'COLLECTOR_TIMEOUT', 0.01)
+    assert collectors.overdue_collectors() == set()
+    release = threading.Event()
+    cache.get('/mnt/nfs', release.wait, 10, default=None)
+    time.sleep(0.05)
+    assert collectors.overdue_collectors() == {'disks'}
+    release.set()
@@ -0,0 +1,37 @@
+import numpy as np
+
+from columnar import MatrixDeviceHistory, MatrixHistory, nullable_list
+
+
+def test_last_and_between_after_wrap_around():
+    history = MatrixHistory(('a', 'b'), capacity=4)
+    for i in range(10):
+        history.append(float(i), [i, -i])
+    times, values = history.last(3)
+    assert times.tolist() == [7, 8, 9]
+    assert values[:, 1].tolist() == [-7, -8, -9]
+    times, values = history.between(5, 9)
+    assert times.tolist() == [6, 7, 8]
+    assert values[:, 0].tolist() == [6, 7, 8]
+
+
+def test_reset_changes_columns_and_drops_rows():
+    history = MatrixHistory(('0',), capacity=4)
+    history.append(1.0, [1])
+    history.reset(('0', '1'))
+    assert len(history) == 0
+    history.append(2.0, [1, 2])
+    assert history.last(5)[1].tolist() == [[1, 2]]
+
+
+def test_missing_values_become_null():
+    history = MatrixDeviceHistory(('cpu', 'memory'), capacity=2)
+    history.append('/a', 1.0, {'cpu': 1.5, 'memory': None})
+    _, values = history.stores['/a'].last(1)
+    assert nullable_list(values[:, 1]) == [None]
+    history.retain([])
+    assert history.stores == {}
+
+
+def test_nullable_list_rounds():
+    assert nullable_list(np.array([1.234, np.nan], np.float32)) == [1.23, None]
@@ -0,0 +1,33 @@
+import subprocess
+import sys
+import threading
+import time
+
+from executor import DaemonPool, DeadlineExecutor
+
+
+def test_late_task_is_stale_with_last_value():
+    executor = DeadlineExecutor(workers=2)
+    release = threading.Event()
+    results, stale = executor.run({'fast': lambda: 1, 'slow': release.wait}, 0.05, {'slow': 'default'})
+    assert results == {'fast': 1, 'slow': 'default'}
+    assert stale == {'slow'}
+    release.set()
+
+
+def test_pool_reuses_idle_threads():
+    pool = DaemonPool(4, 'test')
+    for _ in range(3):
+        assert pool.submit(lambda value: value * 2, 21).result(timeout=1) == 42
+        time.sleep(0.01)
+    assert len(pool._threads) == 1
+    assert pool._threads[0].daemon
+
+
+def test_hung_task_does_not_block_interpreter_exit():
+    # Un recolector colgado para siempre no debe impedir que el proceso termine
+    code = ('import threading, executor\n'
+            'executor.DeadlineExecutor().run({"nfs": threading.Event().wait}, 0.05)\n')
+    started = time.monotonic()
+    subprocess.run([sys.executable, '-c', code], check=True, timeout=10)
+    assert time.monotonic() - started < 10
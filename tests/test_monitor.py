@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+# Muestreadores lentos: las muestras nuevas las provoca cada prueba
+os.environ.setdefault('MONITOR_INTERVAL', '3600')
+os.environ.setdefault('MONITOR_PROCESS_INTERVAL', '3600')
+os.environ.setdefault('MONITOR_CGROUP_INTERVAL', '3600')
+
+import monitor  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    return monitor.app.test_client()
+
+
+def test_data_etag_changes_with_the_process_table(client):
+    first = client.get('/data')
+    etag = first.headers['ETag'].strip('"')
+    assert etag.startswith(monitor.BOOT_ID + '-')
+    assert client.get('/data', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    # La tabla de procesos se actualiza entre dos muestras
+    monitor.process_sampler._tick()
+    second = client.get('/data', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != first.headers['ETag']
+
+
+def test_data_etag_from_another_boot_does_not_match(client, monkeypatch):
+    etag = client.get('/data').headers['ETag']
+    monkeypatch.setattr(monitor, 'BOOT_ID', 'otro')
+    assert client.get('/data', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_streams_above_the_cap_get_503(client, monkeypatch):
+    monkeypatch.setattr(monitor, 'stream_slots', monitor.threading.BoundedSemaphore(1))
+    first = client.get('/stream', buffered=False)
+    assert first.status_code == 200
+    refused = client.get('/stream', buffered=False)
+    assert refused.status_code == 503
+    assert refused.headers['Retry-After'] == '30'
+    # Al cerrarse el primer flujo su hueco queda libre
+    first.close()
+    second = client.get('/stream', buffered=False)
+    assert second.status_code == 200
+    second.close()
+    # Las demás rutas siguen respondiendo
+    assert client.get('/data').status_code == 200
@@ -0,0 +1,103 @@
+import contextlib
+from collections import namedtuple
+from types import SimpleNamespace
+
+import psutil
+import pytest
+
+import processes
+from processes import ProcessHistory, ProcessTable
+
+MemoryInfo = namedtuple('MemoryInfo', 'rss')
+
+
+# psutil mínimo: `table` es {pid: {'name', 'created', 'cpu'}} y puede cambiar entre ticks
+class FakeSystem:
+    def __init__(self):
+        self.table = {}
+        system = self
+
+        class Process:
+            def __init__(self, pid):
+                if pid not in system.table:
+                    raise psutil.NoSuchProcess(pid)
+                self.pid = pid
+                self._created = system.table[pid]['created']
+
+            def _info(self):
+                info = system.table.get(self.pid)
+                if info is None:
+                    raise psutil.NoSuchProcess(self.pid)
+                return info
+
+            def oneshot(self):
+                return contextlib.nullcontext()
+
+            def is_running(self):
+                info = system.table.get(self.pid)
+                return info is not None and info['created'] == self._created
+
+            def cpu_percent(self, interval=None):
+                return self._info()['cpu']
+
+            def memory_info(self):
+                return MemoryInfo(1024)
+
+            def name(self):
+                return self._info()['name']
+
+            def username(self):
+                return 'user-' + self._info()['name']
+
+            def status(self):
+                return 'running'
+
+        self.module = SimpleNamespace(
+            Process=Process,
+            pids=lambda: list(system.table),
+            virtual_memory=lambda: SimpleNamespace(total=1024 ** 2),
+            Error=psutil.Error,
+            NoSuchProcess=psutil.NoSuchProcess,
+            ZombieProcess=psutil.ZombieProcess,
+            AccessDenied=psutil.AccessDenied
+        )
+
+
+@pytest.fixture
+def system(monkeypatch):
+    fake = FakeSystem()
+    monkeypatch.setattr(processes, 'psutil', fake.module)
+    return fake
+
+
+def test_new_processes_start_at_zero_cpu(system):
+    system.table[10] = {'name': 'a', 'created': 1.0, 'cpu': 50.0}
+    table = ProcessTable(top=5)
+    assert table.update()['processes'][0]['cpu_percent'] == 0.0
+    assert table.update()['processes'][0]['cpu_percent'] == 50.0
+
+
+def test_reused_pid_is_tracked_again(system):
+    history = ProcessHistory(points=5, slots=4)
+    table = ProcessTable(top=5, history=history)
+    system.table[10] = {'name': 'old', 'created': 1.0, 'cpu': 80.0}
+    table.update()
+    table.update()
+    assert history.histories()[10]['name'] == 'old'
+
+    # El proceso termina y otro distinto recibe el mismo PID
+    system.table[10] = {'name': 'new', 'created': 2.0, 'cpu': 5.0}
+    top = table.update()['processes']
+    assert [(p['name'], p['username'], p['cpu_percent']) for p in top] == [('new', 'user-new', 0.0)]
+    assert history.histories()[10]['name'] == 'new'
+    assert history.histories()[10]['cpu_percent'][-1] == 0.0
+    assert table.update()['processes'][0]['cpu_percent'] == 5.0
+
+
+def test_exited_processes_are_dropped(system):
+    system.table[10] = {'name': 'a', 'created': 1.0, 'cpu': 1.0}
+    system.table[11] = {'name': 'b', 'created': 1.0, 'cpu': 2.0}
+    table = ProcessTable(top=5)
+    table.update()
+    del system.table[11]
+    assert [p['pid'] for p in table.update()['processes']] == [10]
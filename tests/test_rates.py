@@ -0,0 +1,68 @@
+from collections import namedtuple
+
+import pytest
+
+from rates import COUNTER_32, CounterRates, CpuUsage
+
+CpuTimes = namedtuple('CpuTimes', 'user nice system idle iowait guest')
+
+
+def test_first_reading_is_zero_then_rate_per_second():
+    rates = CounterRates()
+    assert rates.update('eth0', 10.0, {'bytes': 100}) == {'bytes': 0.0}
+    assert rates.update('eth0', 12.0, {'bytes': 300}) == {'bytes': 100.0}
+
+
+def test_same_timestamp_does_not_divide_by_zero():
+    rates = CounterRates()
+    rates.update('eth0', 10.0, {'bytes': 100})
+    assert rates.update('eth0', 10.0, {'bytes': 200}) == {'bytes': 0.0}
+
+
+def test_32_bit_wrap():
+    rates = CounterRates(wrap32=True)
+    rates.update('eth0', 0.0, {'bytes': COUNTER_32 - 100})
+    assert rates.update('eth0', 1.0, {'bytes': 50}) == {'bytes': 150.0}
+
+
+def test_64_bit_counters_never_wrap():
+    # usage_usec de un cgroup recreado: 3e9 -> 1e6 es un reinicio, no 259 núcleos
+    rates = CounterRates()
+    rates.update('/docker', 0.0, {'usage_usec': 3 * 10 ** 9})
+    assert rates.update('/docker', 1.0, {'usage_usec': 10 ** 6}) == {'usage_usec': 10 ** 6}
+
+
+def test_reset_counts_from_zero():
+    rates = CounterRates(wrap32=True)
+    rates.update('eth0', 0.0, {'bytes': 10 * COUNTER_32})
+    assert rates.update('eth0', 1.0, {'bytes': 500}) == {'bytes': 500.0}
+
+
+def test_retain_forgets_removed_keys():
+    rates = CounterRates()
+    rates.update('eth0', 0.0, {'bytes': 100})
+    rates.update('eth1', 0.0, {'bytes': 100})
+    rates.retain(['eth1'])
+    # eth0 vuelve a empezar: la primera lectura vale 0
+    assert rates.update('eth0', 1.0, {'bytes': 200}) == {'bytes': 0.0}
+    assert rates.update('eth1', 1.0, {'bytes': 200}) == {'bytes': 100.0}
+
+
+def test_cpu_usage_per_core_total_and_modes():
+    usage = CpuUsage()
+    first = [CpuTimes(0, 0, 0, 0, 0, 0), CpuTimes(0, 0, 0, 0, 0, 0)]
+    assert usage.update(first) == (0.0, [0.0, 0.0], {})
+    # Núcleo 0 ocupado al 100 %, núcleo 1 parado; guest ya está incluido en user
+    second = [CpuTimes(8, 0, 2, 0, 0, 5), CpuTimes(0, 0, 0, 9, 1, 0)]
+    total, per_core, modes = usage.update(second)
+    assert per_core == [100.0, 0.0]
+    assert total == 50.0
+    assert modes == {'user': 40.0, 'nice': 0.0, 'system': 10.0, 'idle': 45.0, 'iowait': 5.0}
+
+
+def test_cpu_usage_restarts_when_cores_change():
+    usage = CpuUsage()
+    usage.update([CpuTimes(0, 0, 0, 0, 0, 0)])
+    assert usage.update([CpuTimes(1, 0, 0, 1, 0, 0)] * 2) == (0.0, [0.0, 0.0], {})
+    total, _, _ = usage.update([CpuTimes(2, 0, 0, 2, 0, 0)] * 2)
+    assert total == pytest.approx(50.0)
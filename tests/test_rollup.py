@@ -0,0 +1,71 @@
+import pytest
+
+from rollup import RollupHistory, RollupTier, parse_range
+from timeseries import TimeSeriesStore
+
+
+@pytest.mark.parametrize('text, seconds', [('90', 90), ('90s', 90), ('30m', 1800), ('6h', 21600),
+                                           ('7d', 604800), ('1.5h', 5400)])
+def test_parse_range(text, seconds):
+    assert parse_range(text) == seconds
+
+
+@pytest.mark.parametrize('text', ['', '0', '-1h', '6x', 'h'])
+def test_parse_range_rejects(text):
+    with pytest.raises(ValueError):
+        parse_range(text)
+
+
+def test_tier_closes_buckets_and_exposes_the_open_one():
+    tier = RollupTier(['a'], resolution=10, retention=100)
+    for t, value in ((0, 1.0), (5, 3.0), (10, 7.0), (12, 1.0)):
+        tier.add(float(t), {'a': value})
+    _, rows = tier.store.after(0, 10)
+    assert rows['time'].tolist() == [0]
+    assert (rows['a_min'][0], rows['a_max'][0], rows['a_avg'][0]) == (1.0, 3.0, 2.0)
+    assert tier.partial() == (10, {'a_min': 1.0, 'a_max': 7.0, 'a_avg': 4.0})
+
+
+def test_query_regroups_and_includes_the_open_bucket():
+    raw = TimeSeriesStore(['a'], capacity=10)
+    rollups = RollupHistory(raw, 1.0, tiers=((10, 1000),))
+    for t in range(100):
+        raw.append(float(t), {'a': float(t)})
+        rollups.add(float(t), {'a': float(t)})
+    result = rollups.query(100.0, 100, points=5)
+    assert result['resolution'] == 20
+    assert result['labels'] == [0, 20, 40, 60, 80]
+    series = result['series']['a']
+    assert series['min'] == [0, 20, 40, 60, 80]
+    # El último grupo incluye el cubo abierto (90-99)
+    assert series['max'][-1] == 99
+    assert series['avg'][-1] == pytest.approx(89.5)
+
+
+@pytest.mark.parametrize('seconds, points, resolution', [
+    (90, 300, 1),          # Rango corto: datos crudos
+    (3600, 300, 10),       # 3600 crudos > 10 * 300: nivel de 10 s
+    (86400, 300, 60),      # 8640 de 10 s superan el límite: 1440 de 1 min
+    (7 * 86400, 300, 600),  # 60480 de 10 s y 10080 de 1 min superan el límite
+    (7 * 86400, 2000, 60),
+])
+def test_pick_bounds_the_buckets_read(seconds, points, resolution):
+    rollups = RollupHistory(TimeSeriesStore(['a'], capacity=7 * 86400), 1.0)
+    assert rollups.pick(seconds, points)[0] == resolution
+
+
+def test_pick_skips_tiers_that_do_not_cover_the_range():
+    rollups = RollupHistory(TimeSeriesStore(['a'], capacity=60), 1.0)
+    assert rollups.pick(30, 300, age=3600)[0] == 10
+    assert rollups.pick(30, 300, age=365 * 86400)[0] == 600
+
+
+def test_query_fills_the_point_budget():
+    raw = TimeSeriesStore(['a'], capacity=4000)
+    rollups = RollupHistory(raw, 1.0)
+    for t in range(3600):
+        raw.append(float(t), {'a': 1.0})
+        rollups.add(float(t), {'a': 1.0})
+    result = rollups.query(3600.0, 3600, points=300)
+    assert len(result['labels']) == 300
+    assert result['resolution'] == 12
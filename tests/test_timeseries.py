@@ -0,0 +1,80 @@
+from array import array
+
+from timeseries import DeviceHistory, RingBuffer, TimeSeriesStore
+
+
+def fill(store, count, start=0):
+    for i in range(start, start + count):
+        store.append(float(i), {'a': float(i), 'b': -float(i)})
+
+
+def test_ring_buffer_write_and_slice_wrap_around():
+    ring = RingBuffer(5)
+    ring.write(3, array('d', [3, 4, 5, 6]))
+    assert ring.slice(3, 7).tolist() == [3, 4, 5, 6]
+    assert ring.get(5) == 5
+
+
+def test_ring_buffer_write_keeps_only_last_capacity_values():
+    ring = RingBuffer(3)
+    ring.write(0, array('d', range(10)))
+    assert ring.slice(0, 3).tolist() == [7, 8, 9]
+
+
+def test_after_returns_only_new_samples():
+    store = TimeSeriesStore(['a', 'b'], capacity=10)
+    fill(store, 4)
+    cursor, rows = store.after(0, 100)
+    assert cursor == 4
+    assert rows['a'].tolist() == [0, 1, 2, 3]
+    fill(store, 2, start=4)
+    cursor, rows = store.after(cursor, 100)
+    assert cursor == 6
+    assert rows['a'].tolist() == [4, 5]
+    assert store.after(cursor, 100)[1]['a'].tolist() == []
+
+
+def test_after_across_wrap_around_and_limit():
+    store = TimeSeriesStore(['a', 'b'], capacity=4)
+    fill(store, 10)
+    cursor, rows = store.after(0, 100)
+    assert cursor == 10
+    assert rows['time'].tolist() == [6, 7, 8, 9]
+    assert rows['b'].tolist() == [-6, -7, -8, -9]
+    assert store.after(0, 2)[1]['a'].tolist() == [8, 9]
+    assert store.after(8, 100)[1]['a'].tolist() == [8, 9]
+
+
+def test_after_with_cursor_from_the_future_starts_over():
+    store = TimeSeriesStore(['a', 'b'], capacity=4)
+    fill(store, 3)
+    cursor, rows = store.after(50, 100)
+    assert cursor == 3
+    assert rows['a'].tolist() == [0, 1, 2]
+
+
+def test_between_and_oldest_after_wrap_around():
+    store = TimeSeriesStore(['a', 'b'], capacity=5)
+    assert store.oldest() is None
+    fill(store, 12)
+    assert store.oldest() == 7
+    assert store.between(8, 10, ['a'])['a'].tolist() == [8, 9]
+    assert store.between(0, 100)['time'].tolist() == [7, 8, 9, 10, 11]
+
+
+def test_extend_larger_than_capacity():
+    store = TimeSeriesStore(['a', 'b'], capacity=3)
+    fill(store, 2)
+    store.extend(array('d', [10, 11, 12, 13]), {'a': array('d', [1, 2, 3, 4])})
+    assert store.count == 6
+    cursor, rows = store.after(0, 10)
+    assert rows['time'].tolist() == [11, 12, 13]
+    assert rows['a'].tolist() == [2, 3, 4]
+    assert rows['b'].tolist() == [0, 0, 0]
+
+
+def test_device_history_creates_a_store_per_device():
+    history = DeviceHistory(['x'], capacity=2)
+    history.append('eth0', 1.0, {'x': 1.0})
+    history.append('eth1', 1.0, {'x': 2.0})
+    assert sorted(history.stores) == ['eth0', 'eth1']
@@ -0,0 +1,129 @@
+import threading
+from array import array
+
+
+# Buffer circular de tamaño fijo sobre un array de doubles preasignado
+class RingBuffer:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = array('d', bytes(8 * capacity))
+
+    def put(self, index, value):
+        self._data[index % self.capacity] = value
+
+    def get(self, index):
+        return self._data[index % self.capacity]
+
+    # Escribir en bloque `values` a partir de la posición lógica `start`
+    def write(self, start, values):
+        values = values[-self.capacity:]
+        a = start % self.capacity
+        b = a + len(values)
+        if b <= self.capacity:
+            self._data[a:b] = values
+        else:
+            split = self.capacity - a
+            self._data[a:] = values[:split]
+            self._data[:b - self.capacity] = values[split:]
+
+    # Copiar los valores de las posiciones lógicas [start, stop) en orden cronológico
+    def slice(self, start, stop):
+        a = start % self.capacity
+        b = a + (stop - start)
+        if b <= self.capacity:
+            return self._data[a:b]
+        return self._data[a:] + self._data[:b - self.capacity]
+
+
+# Almacén de series temporales: una marca de tiempo y un buffer por métrica.
+# Admite un único escritor (el muestreador) y lectores concurrentes.
+class TimeSeriesStore:
+    def __init__(self, metrics, capacity):
+        self.capacity = capacity
+        self.metrics = tuple(metrics)
+        self.count = 0  # Total de muestras escritas desde el arranque
+        self._times = RingBuffer(capacity)
+        self._series = {name: RingBuffer(capacity) for name in self.metrics}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, timestamp, values):
+        with self._lock:
+            index = self.count
+            self._times.put(index, timestamp)
+            for name, ring in self._series.items():
+                ring.put(index, values.get(name, 0.0))
+            # Publicar la muestra solo cuando todas las series están escritas
+            self.count = index + 1
+
+    # Carga en bloque de muestras ya ordenadas (p. ej. al recuperar el historial
+    # del disco); las series ausentes en `columns` se rellenan con ceros
+    def extend(self, times, columns):
+        n = min(len(times), self.capacity)
+        with self._lock:
+            start = self.count + len(times) - n
+            self._times.write(start, times)
+            for name, ring in self._series.items():
+                ring.write(start, columns.get(name, array('d', bytes(8 * n))))
+            self.count += len(times)
+
+    # Rango lógico [start, stop) de las últimas `n` muestras disponibles
+    def _window(self, n):
+        stop = self.count
+        return max(0, stop - min(n, self.capacity)), stop
+
+    # Muestras escritas después del cursor `cursor` (como mucho las `limit` más
+    # recientes). Devuelve el nuevo cursor junto con las series. Un cursor
+    # posterior al actual (p. ej. tras reiniciar el servidor) se trata como 0.
+    def after(self, cursor, limit, metrics=None):
+        with self._lock:
+            start, stop = self._window(limit)
+            if cursor <= stop:
+                start = max(start, cursor)
+            result = {'time': self._times.slice(start, stop)}
+            for name in metrics or self.metrics:
+                result[name] = self._series[name].slice(start, stop)
+        return stop, result
+
+    # Posición lógica de la primera muestra con marca de tiempo >= `timestamp`
+    def _bisect(self, timestamp):
+        lo, hi = self._window(self.capacity)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._times.get(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    # Marca de tiempo de la muestra más antigua que sigue en memoria
+    def oldest(self):
+        with self._lock:
+            start, stop = self._window(self.capacity)
+            return self._times.get(start) if stop else None
+
+    # Muestras con marca de tiempo en [start, end)
+    def between(self, start, end, metrics=None):
+        with self._lock:
+            start, stop = self._bisect(start), self._bisect(end)
+            result = {'time': self._times.slice(start, stop)}
+            for name in metrics or self.metrics:
+                result[name] = self._series[name].slice(start, stop)
+        return result
+
+
+# Historial por dispositivo (interfaz de red, disco...): un almacén por
+# dispositivo con las mismas métricas, creado la primera vez que aparece.
+class DeviceHistory:
+    def __init__(self, metrics, capacity):
+        self.metrics = tuple(metrics)
+        self.capacity = capacity
+        self.stores = {}
+
+    def append(self, device, timestamp, values):
+        store = self.stores.get(device)
+        if store is None:
+            store = self.stores[device] = TimeSeriesStore(self.metrics, self.capacity)
+        store.append(timestamp, values)
@@ -0,0 +1,48 @@
+"""Punto de entrada de producción.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+A diferencia de `python monitor.py` (servidor de desarrollo de Flask, con
+recarga de código), aquí la aplicación corre sin modo de depuración bajo un
+servidor WSGI, en un único proceso con varios hilos (ver gunicorn.conf.py).
+La plantilla se compila al importar y las respuestas de texto se sirven
+comprimidas con gzip (o brotli, si está instalado).
+"""
+from flask import request
+
+from assets import compress, compressible, negotiate
+
+
+# Comprimir las respuestas dinámicas (/data, /metrics, /agent/metrics...).
+# La página principal y los recursos estáticos ya llegan comprimidos, y los
+# flujos (/stream) no se tocan para no retrasar los eventos.
+def compress_response(response):
+    if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+            or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    encoding = negotiate(request.accept_encodings)
+    if encoding is None or not compressible(response.mimetype, len(body)):
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+# No es una fábrica: monitor.py crea una única aplicación al importarse, junto
+# con el estado del proceso (muestreadores, historial, alertas). create_app()
+# la configura para producción, arranca los muestreadores y la devuelve;
+# llamarla de nuevo devuelve la misma aplicación.
+def create_app():
+    import monitor
+
+    app = monitor.app
+    app.config.update(DEBUG=False, TEMPLATES_AUTO_RELOAD=False)
+    if compress_response not in app.after_request_funcs.setdefault(None, []):
+        app.after_request(compress_response)
+    monitor.start_samplers()
+    return app
+
+
+app = create_app()